@@ -0,0 +1 @@
+"""Воспроизводимые бенчмарки TaskTree: python -m app.bench --help."""
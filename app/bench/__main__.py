@@ -0,0 +1,80 @@
+"""python -m app.bench — бенчмарки со сравнимым между коммитами JSON-отчётом.
+
+    python -m app.bench --shapes wide,deep,balanced --sizes 1k,10k --out bench.json
+    python -m app.bench --sizes 10k --compare bench.json   # код 1 при регрессии
+    python -m app.bench --suite ui --sizes 10k             # Qt без дисплея (offscreen)
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+from . import data, ui
+from .common import SHAPES, compare, format_table, load_report, meta
+
+SUITES = {"data": data.run, "ui": ui.run}
+
+
+def parse_size(text: str) -> int:
+    """«1k», «250k», «1M», «5000» -> число узлов."""
+    text = text.strip().lower()
+    mult = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if mult > 1 else text) * mult)
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(prog="python -m app.bench", description=__doc__.splitlines()[0])
+    p.add_argument("--suite", default="data", help=f"через запятую: {', '.join(SUITES)}")
+    p.add_argument("--shapes", default="wide,deep,balanced", help=f"через запятую: {', '.join(SHAPES)}")
+    p.add_argument("--sizes", default="1k,10k", help="размеры деревьев: 1k, 100k, 1M")
+    p.add_argument("--ops", type=int, default=50, help="вызовов на операцию")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", type=Path, help="куда записать JSON (по умолчанию stdout)")
+    p.add_argument("--compare", type=Path, help="отчёт прошлого прогона для сравнения")
+    p.add_argument("--threshold", type=float, default=1.25,
+                   help="регрессия — медиана выросла больше чем во столько раз")
+    args = p.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    suites = [s.strip() for s in args.suite.split(",") if s.strip()]
+    shapes = [s.strip() for s in args.shapes.split(",") if s.strip()]
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    for name in suites:
+        if name not in SUITES:
+            p.error(f"неизвестный набор: {name}")
+    for shape in shapes:
+        if shape not in SHAPES:
+            p.error(f"неизвестная форма: {shape}")
+
+    results = []
+    for name in suites:
+        for shape in shapes:
+            for n in sizes:
+                print(f"… {name} {shape} {n}", file=sys.stderr)
+                results.extend(SUITES[name](shape, n, ops=args.ops, seed=args.seed))
+    report = {
+        "meta": meta(suites=suites, shapes=shapes, sizes=sizes, ops=args.ops, seed=args.seed),
+        "results": results,
+    }
+    print(format_table(results), file=sys.stderr)
+
+    text = json.dumps(report, ensure_ascii=False, indent=1)
+    if args.out:
+        args.out.write_text(text, encoding="utf-8")
+    else:
+        print(text)
+
+    if args.compare:
+        diff = compare(load_report(args.compare), report, args.threshold)
+        for d in diff:
+            mark = "  РЕГРЕССИЯ" if d["regression"] else ""
+            print(f"{d['key']:<40} {d['old_ms']:>10.3f} -> {d['new_ms']:>10.3f}  x{d['ratio']}{mark}",
+                  file=sys.stderr)
+        if any(d["regression"] for d in diff):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
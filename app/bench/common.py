@@ -0,0 +1,192 @@
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from app.core.config import settings
+from app.data import db
+from app.data.repositories import TaskRepository
+
+# форма дерева: число корней и ветвление; deep — цепочки фиксированной глубины
+SHAPES = ("wide", "deep", "balanced")
+DEEP_DEPTH = 200
+WORDS = (
+    "отчёт", "сервер", "деплой", "ревью", "план", "бюджет", "тест", "релиз",
+    "миграция", "дизайн", "alpha", "beta", "kube", "docker", "cloud", "backup",
+)
+CATEGORIES = ("работа", "учёба", "дом", None)
+# строки вставляются порциями: миллион словарей разом не держим
+IMPORT_CHUNK = 50_000
+
+
+@contextmanager
+def temp_db(directory: Optional[Path] = None):
+    """Чистая БД во временном каталоге на время блока; settings.db_path восстанавливается."""
+    old = settings.db_path
+    with tempfile.TemporaryDirectory(prefix="tt-bench-", dir=directory) as tmp:
+        settings.db_path = Path(tmp) / "bench.db"
+        db.reset_engine()
+        try:
+            db.ensure_db()
+            yield settings.db_path
+        finally:
+            db.reset_engine()
+            settings.db_path = old
+
+
+def _layout(shape: str, n: int) -> tuple[int, int]:
+    """(корней, детей на узел) для формы дерева."""
+    if shape == "wide":
+        return min(n, 10), n
+    if shape == "deep":
+        return max(1, n // DEEP_DEPTH), 1
+    if shape == "balanced":
+        return min(n, 10), 10
+    raise ValueError(f"Неизвестная форма дерева: {shape}")
+
+
+def _row(rnd: random.Random, parent_id: Optional[int], i: int) -> dict:
+    title = f"{rnd.choice(WORDS)} {rnd.choice(WORDS)} {i}"
+    return {
+        "parent_id": parent_id,
+        "title": title,
+        "description": " ".join(rnd.choices(WORDS, k=8)) if i % 4 == 0 else None,
+        "status": "done" if rnd.random() < 0.2 else "todo",
+        "priority": rnd.randint(1, 5),
+        "category": rnd.choice(CATEGORIES),
+    }
+
+
+def generate(repo: TaskRepository, shape: str, n: int, seed: int = 0) -> List[List[int]]:
+    """Строит синтетическое дерево из n узлов через add_many, уровень за уровнем.
+
+    Возвращает id по уровням (levels[0] — корни): бенчмарки выбирают по ним узлы.
+    """
+    rnd = random.Random(seed)
+    roots, fanout = _layout(shape, n)
+    levels: List[List[int]] = []
+    parents: Sequence[Optional[int]] = [None] * roots
+    made = 0
+    while made < n and parents:
+        count = min(n - made, len(parents) * fanout) if levels else len(parents)
+        # дети раздаются родителям по кругу — ветви одного уровня равны
+        rows = (_row(rnd, parents[i % len(parents)], made + i) for i in range(count))
+        ids: List[int] = []
+        for chunk in _chunks(rows, IMPORT_CHUNK):
+            ids.extend(repo.add_many(chunk))
+        levels.append(ids)
+        made += count
+        parents = ids
+    return levels
+
+
+def _chunks(items: Iterable, size: int) -> Iterable[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def measure(fn: Callable, calls: Sequence[tuple]) -> tuple[List[float], float]:
+    """timed() плюс среднее число SQL-запросов на вызов."""
+    with db.query_profile() as sql:
+        samples = timed(fn, calls)
+    return samples, round(sql.count / max(1, len(calls)), 2)
+
+
+def timed(fn: Callable, calls: Iterable[tuple]) -> List[float]:
+    """Длительности fn(*args) в секундах — по одной на набор аргументов."""
+    out = []
+    for args in calls:
+        t0 = time.perf_counter()
+        fn(*args)
+        out.append(time.perf_counter() - t0)
+    return out
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "count": len(ms),
+        "median_ms": round(statistics.median(ms), 4),
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 4),
+        "min_ms": round(ms[0], 4),
+        "total_s": round(sum(ms) / 1000, 4),
+    }
+
+
+def result(suite: str, shape: str, nodes: int, op: str, samples: Sequence[float], **extra) -> dict:
+    return {"suite": suite, "shape": shape, "nodes": nodes, "op": op, **summarize(samples), **extra}
+
+
+def meta(**params) -> dict:
+    """Окружение прогона: по нему видно, сравнимы ли два отчёта."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "sqlite_tuning": settings.sqlite_tuning,
+        "params": params,
+    }
+
+
+def _key(r: dict) -> tuple:
+    return r["suite"], r["shape"], r["nodes"], r["op"]
+
+
+def compare(old: dict, new: dict, threshold: float = 1.25) -> List[dict]:
+    """Сравнивает медианы двух отчётов; regression — медиана выросла больше чем в threshold раз."""
+    base = {_key(r): r for r in old["results"]}
+    out = []
+    for r in new["results"]:
+        b = base.get(_key(r))
+        if b is None or not b["median_ms"]:
+            continue
+        ratio = r["median_ms"] / b["median_ms"]
+        out.append({
+            "key": "/".join(map(str, _key(r))),
+            "old_ms": b["median_ms"],
+            "new_ms": r["median_ms"],
+            "ratio": round(ratio, 3),
+            "regression": ratio > threshold,
+        })
+    return out
+
+
+def load_report(path: Path) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def format_table(results: Iterable[dict]) -> str:
+    lines = [f"{'suite':<6} {'shape':<9} {'nodes':>8} {'op':<18} {'n':>5} {'median ms':>11} {'p95 ms':>10} {'sql/op':>8}"]
+    for r in results:
+        lines.append(
+            f"{r['suite']:<6} {r['shape']:<9} {r['nodes']:>8} {r['op']:<18} "
+            f"{r['count']:>5} {r['median_ms']:>11.3f} {r['p95_ms']:>10.3f} {_fmt_sql(r.get('sql_per_op')):>8}"
+        )
+    return "\n".join(lines)
+
+
+def _fmt_sql(value) -> str:
+    return "-" if value is None else f"{value:g}"
@@ -0,0 +1,78 @@
+import random
+import time
+from typing import List
+
+from app.data.repositories import TaskRepository
+from app.domain.models import Task
+from .common import WORDS, generate, measure, result, temp_db
+
+SUITE = "data"
+
+
+def run(shape: str, nodes: int, ops: int = 50, seed: int = 0) -> List[dict]:
+    """Замеры TaskRepository на дереве shape из nodes узлов (чистая временная БД).
+
+    ops — число вызовов на операцию; разрушающие (move, reorder, delete) идут последними.
+    """
+    rnd = random.Random(seed)
+    out: List[dict] = []
+
+    def add(op, measured, **extra):
+        samples, sql = measured
+        out.append(result(SUITE, shape, nodes, op, samples, sql_per_op=sql, **extra))
+
+    with temp_db():
+        repo = TaskRepository()
+        t0 = time.perf_counter()
+        levels = generate(repo, shape, nodes, seed)
+        took = time.perf_counter() - t0
+        add("bulk_import", ([took], None), rows_per_s=round(nodes / took))
+
+        every = [tid for level in levels for tid in level]
+        inner = [tid for level in levels[:-1] for tid in level] or levels[0]
+        # поддеревья среднего размера: узлы из середины глубины
+        mid = levels[len(levels) // 2 - 1] if len(levels) > 1 else levels[0]
+
+        add("add", measure(
+            lambda p: repo.add(Task(parent_id=p, title=f"{rnd.choice(WORDS)} new")),
+            [(rnd.choice(every),) for _ in range(ops)],
+        ))
+        repo.cache.clear()
+        add("get", measure(repo.get, [(rnd.choice(every),) for _ in range(ops)]))
+        add("children", measure(
+            lambda p: repo.children_plain(p, with_counts=True),
+            [(rnd.choice(inner),) for _ in range(ops)],
+        ))
+        add("roots", measure(lambda: repo.children_plain(None, with_counts=True), [()] * ops))
+        add("tree_load", measure(repo.tree_plain, [()] * max(1, min(ops, 5))))
+        add("subtree", measure(repo.subtree_plain, [(rnd.choice(mid),) for _ in range(ops)]))
+        add("search", measure(
+            lambda q: repo.search_plain(q, limit=200),
+            [(rnd.choice(WORDS)[:4],) for _ in range(ops)],
+        ))
+
+        add("move", measure(lambda a, b: _move(repo, a, b, 0),
+                          [(rnd.choice(every[1:] or every), rnd.choice(inner)) for _ in range(ops)]))
+        add("reorder", measure(repo.reorder, [_shuffled_siblings(repo, rnd, rnd.choice(inner))
+                                              for _ in range(ops)]))
+        victims = rnd.sample(mid, min(len(mid), max(1, ops // 5)))
+        add("cascade_delete", measure(repo.delete, [(v,) for v in victims]))
+    return out
+
+
+def _move(repo: TaskRepository, task_id: int, parent_id: int, index: int):
+    try:
+        repo.move(task_id, parent_id, index)
+    except ValueError:
+        pass   # цель оказалась внутри переносимого поддерева — случайный выбор, не ошибка
+
+
+# столько братьев переставляет один reorder — видимый список, а не весь широкий уровень
+REORDER_SIBLINGS = 200
+
+
+def _shuffled_siblings(repo: TaskRepository, rnd: random.Random, parent_id: int) -> tuple:
+    """Аргументы repo.reorder(): родитель и его дети в случайном порядке (готовятся до замера)."""
+    ids = [tid for (tid,) in repo.project(["id"], parent_id=parent_id)][:REORDER_SIBLINGS]
+    rnd.shuffle(ids)
+    return parent_id, ids
@@ -0,0 +1,90 @@
+import os
+import random
+from typing import List
+
+from app.data.repositories import TaskRepository
+from .common import generate, measure, result, temp_db
+
+SUITE = "ui"
+TYPING_BURST = " quick typing burst"   # keyClicks понимает только ASCII
+
+
+def run(shape: str, nodes: int, ops: int = 50, seed: int = 0) -> List[dict]:
+    """Замеры Qt-стороны без дисплея: TaskTreeModel и TaskEditor на синтетической БД.
+
+    Для каждой операции — время на вызов и среднее число SQL-запросов (sql_per_op).
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtCore import QModelIndex, Qt
+    from PySide6.QtTest import QTest
+    from PySide6.QtWidgets import QApplication
+    from app.core.events import (
+        EventBus, TaskAdded, TaskDeleted, TaskMoved, TaskUpdated, TasksChanged, TasksReordered,
+    )
+    from app.domain.services import NodeStatsService
+    from app.ui.viewmodels.tree_vm import TaskTreeModel
+    from app.ui.views.task_editor import TaskEditor
+    from app.usecases.toggle_status import ToggleStatus, ToggleStatusInput
+
+    app = QApplication.instance() or QApplication([])
+    rnd = random.Random(seed)
+    out: List[dict] = []
+
+    def add(op, measured, **extra):
+        samples, sql = measured
+        out.append(result(SUITE, shape, nodes, op, samples, sql_per_op=sql, **extra))
+
+    def traverse(model, parent=QModelIndex()) -> int:
+        """Обход, как у развёрнутого представления: index/parent/data по всем колонкам."""
+        if model.canFetchMore(parent):
+            model.fetchMore(parent)
+        seen = 0
+        for r in range(model.rowCount(parent)):
+            for c in range(model.columnCount(parent)):
+                idx = model.index(r, c, parent)
+                model.data(idx, Qt.ItemDataRole.DisplayRole)
+                model.parent(idx)
+            seen += 1 + traverse(model, model.index(r, 0, parent))
+        return seen
+
+    with temp_db():
+        repo = TaskRepository()
+        levels = generate(repo, shape, nodes, seed)
+        every = [tid for level in levels for tid in level]
+        reloads = [()] * max(1, min(ops, 5))
+
+        model = TaskTreeModel(repo, lazy=False)
+        add("reload", measure(model.reload, reloads))
+        add("traverse", measure(lambda: traverse(model), [()] * 2))
+        picks = [model.index_for_id(rnd.choice(every)) for _ in range(ops * 20)]
+        add("parent", measure(lambda i: model.parent(i), [(i,) for i in picks]))
+
+        lazy = TaskTreeModel(repo, lazy=True)
+        add("reload_lazy", measure(lazy.reload, reloads))
+        # каждый обход начинается с нераскрытых корней — считается и fetchMore
+        add("traverse_lazy", measure(lambda: (lazy.reload(), traverse(lazy)), [()] * 2))
+
+        bus = EventBus()
+        NodeStatsService(repo, bus)
+        for evt in (TaskAdded, TaskDeleted, TaskMoved, TaskUpdated, TasksChanged, TasksReordered):
+            bus.subscribe(evt, model.apply_event)
+        editor = TaskEditor(repo, bus)
+        editor.timer.stop()
+        repo.cache.clear()
+        add("select", measure(editor.load_task, [(rnd.choice(every),) for _ in range(ops)]))
+
+        def typing(task_id):
+            editor.load_task(task_id)
+            editor.title.setFocus()
+            QTest.keyClicks(editor.title, TYPING_BURST)
+            editor.flush()
+            app.processEvents()
+
+        add("typing_burst", measure(typing, [(rnd.choice(every),) for _ in range(ops)]),
+            keys=len(TYPING_BURST))
+        toggle = ToggleStatus(repo, bus)
+        add("toggle_status", measure(lambda t: toggle.execute(ToggleStatusInput(t)),
+                                         [(rnd.choice(every),) for _ in range(ops)]))
+        editor.deleteLater()
+        app.processEvents()
+    return out
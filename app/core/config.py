@@ -1,16 +1,48 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
 from pathlib import Path
+from typing import Optional
+from app.core.defaults import ENV_PREFIX, THEME_QSS
 
 
 class Settings(BaseSettings):
     app_name: str = "TaskTree"
     db_path: Path = Field(default=Path("tasks.db"))
-    theme_qss: Path = Field(default=Path("app/themes/qss/dark_green.qss"))
+    theme_qss: Path = Field(default=THEME_QSS)
     lang: str = "ru"
+    # дерево подгружает детей только при раскрытии узла
+    tree_lazy: bool = False
+    # колонки дерева после названия: progress, status, priority, due, category
+    tree_columns: list[str] = ["progress", "status", "priority", "due", "category"]
+    # ёмкость LRU-кэша записей задач в репозитории (0 — выключен)
+    record_cache_size: int = 20_000
+    # события шины доставляются через цикл Qt (одна порция за итерацию), а не внутри emit()
+    events_queued: bool = False
+    # окно «тишины» перед автосохранением редактора, мс
+    autosave_debounce_ms: int = 600
+
+    # SQLite: профиль производительности, PRAGMA на каждом новом соединении
+    sqlite_tuning: bool = True
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 256 * 1024 * 1024   # байт
+    sqlite_cache_size: int = -64_000            # < 0 — в KiB (≈64 МБ)
+    sqlite_temp_store: str = "MEMORY"
+    sqlite_busy_timeout: int = 5000             # мс
+
+    # профилирование SQL: общая статистика db.query_stats с первого запроса
+    sql_profile: bool = False
+    # запросы дольше порога пишутся в лог предупреждением (и без sql_profile);
+    # 0 — выключено: без профилирования хуки на движок не вешаются
+    sql_slow_ms: float = 0.0
+
+    # трассировка usecase'ов: спаны и гистограммы (app.core.tracing), панель в статус-баре
+    trace: bool = False
+    # куда записать гистограммы спанов при выходе (JSON); None — не писать
+    trace_file: Optional[Path] = None
 
     class Config:
-        env_prefix = "TT_"
+        env_prefix = ENV_PREFIX
         extra = "ignore"
 
 
@@ -0,0 +1,11 @@
+import os
+from pathlib import Path
+
+# общие для Settings и кода, который работает до загрузки pydantic-settings (~0.3 с)
+ENV_PREFIX = "TT_"
+THEME_QSS = Path("app/themes/qss/dark_green.qss")
+
+
+def theme_qss() -> Path:
+    """Settings.theme_qss без импорта config: TT_THEME_QSS или тема по умолчанию."""
+    return Path(os.environ.get(f"{ENV_PREFIX}THEME_QSS", THEME_QSS))
@@ -1,28 +1,208 @@
-﻿from dataclasses import dataclass
+﻿import threading
+import weakref
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.tracing import tracer
+
 
 class EventBus:
-    def __init__(self):
-        self._subs = {}
+    """Шина событий задач.
+
+    По умолчанию emit() вызывает подписчиков сразу. С планировщиком
+    (set_scheduler) события копятся в потокобезопасной очереди, а планировщик
+    просит владельца вызвать flush() позже — например, на следующей итерации
+    цикла Qt (см. app.ui.viewmodels.event_pump). Так правка из обработчика
+    сигнала не перестраивает дерево посреди этого обработчика.
+
+    Несколько событий такта доставляются одним TasksChanged, как batch():
+    к моменту доставки в БД уже все их записи, и подписчик, читающий БД,
+    должен видеть их вместе, а не применять по одному поверх конечного состояния.
+    """
+
+    def __init__(self, scheduler: Optional[Callable[[], None]] = None):
+        self._subs: Dict[type, List[tuple]] = {}   # тип -> [(priority, ref)]
+        self._batch: Optional[List] = None   # события открытого batch()
+        self._depth = 0
+        self._scheduler = scheduler
+        self._pending: List = []
+        self._lock = threading.Lock()
+
+    @property
+    def queued(self) -> bool:
+        return self._scheduler is not None
+
+    def set_scheduler(self, scheduler: Optional[Callable[[], None]]):
+        """scheduler() — «вызовите flush() позже»; None возвращает синхронную доставку."""
+        self._scheduler = scheduler
+        if scheduler is None:
+            self.flush()
 
-    def subscribe(self, event_type, handler):
-        self._subs.setdefault(event_type, []).append(handler)
+    def subscribe(self, event_type, handler, priority: int = 0, weak: bool = False):
+        """Подписчики с большим priority вызываются раньше (кэши — до виджетов).
+
+        weak=True хранит слабую ссылку (для методов — WeakMethod): подписка
+        исчезает вместе с объектом и не держит мёртвые виджеты. Лямбды так не подписывать.
+        """
+        if weak:
+            ref = weakref.WeakMethod(handler) if hasattr(handler, "__self__") else weakref.ref(handler)
+        else:
+            ref = lambda: handler
+        subs = self._subs.setdefault(event_type, [])
+        subs.append((priority, ref))
+        subs.sort(key=lambda s: -s[0])   # сортировка устойчива: внутри приоритета — порядок подписки
+
+    def unsubscribe(self, event_type, handler):
+        subs = self._subs.get(event_type, [])
+        subs[:] = [s for s in subs if s[1]() not in (None, handler)]
 
     def emit(self, event):
-        for h in self._subs.get(type(event), []):
-            h(event)
+        if self._batch is not None:
+            self._batch.append(event)
+            return
+        if self._scheduler is None:
+            self._deliver(event)
+            return
+        with self._lock:
+            wake = not self._pending
+            self._pending.append(event)
+        if wake:
+            self._scheduler()
+
+    def flush(self) -> int:
+        """Доставляет накопленные события (повторы за такт выбрасываются); возвращает их число.
+
+        Одно событие приходит как есть, несколько — одним TasksChanged.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        events = []
+        for e in pending:
+            events.extend(e.events if isinstance(e, TasksChanged) else [e])
+        events = dedupe(events)
+        if len(events) == 1 and not isinstance(pending[0], TasksChanged):
+            self._deliver(events[0])
+        elif events:
+            self._deliver(TasksChanged(events))
+        return len(events)
+
+    def _deliver(self, event):
+        subs = self._subs.get(type(event))
+        if not subs:
+            return
+        dead = False
+        with tracer.span(f"emit {type(event).__name__}"):
+            for _, ref in list(subs):
+                handler = ref()
+                if handler is None:
+                    dead = True
+                    continue
+                if tracer.enabled:
+                    with tracer.span(getattr(handler, "__qualname__", repr(handler))):
+                        handler(event)
+                else:
+                    handler(event)
+        if dead:
+            subs[:] = [s for s in subs if s[1]() is not None]
+
+    @contextmanager
+    def batch(self):
+        """Копит события блока и доставляет их одним TasksChanged при выходе.
+
+        При исключении события отбрасываются — изменения откатились вместе с
+        транзакцией. С репозиторием: `with bus.batch(), repo.batch():` —
+        коммит происходит раньше доставки. Вложенные batch() сливаются во внешний.
+        """
+        if self._batch is None:
+            self._batch = []
+        self._depth += 1
+        ok = False
+        try:
+            yield self
+            ok = True
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                events, self._batch = self._batch, None
+                if ok and events:
+                    self.emit(TasksChanged(coalesce(events)))
+
+
+def coalesce(events: List) -> List:
+    """Сливает подряд идущие TaskUpdated одной задачи и убирает точные повторы."""
+    out: List = []
+    for e in events:
+        prev = out[-1] if out else None
+        if isinstance(e, TaskUpdated) and isinstance(prev, TaskUpdated) and prev.task_id == e.task_id:
+            out[-1] = TaskUpdated(e.task_id, {**prev.changes, **e.changes}, {**e.previous, **prev.previous})
+        elif e != prev:
+            out.append(e)
+    return out
+
+
+def dedupe(events: List) -> List:
+    """coalesce() плюс отбрасывание события, равного предыдущему событию той же задачи.
+
+    Сравнение только с последним событием задачи: «done, todo, done» не схлопнется.
+    """
+    out: List = []
+    last: Dict[int, Any] = {}
+    for e in coalesce(events):
+        tid = getattr(e, "task_id", None)
+        if tid is not None:
+            if last.get(tid) == e:
+                continue
+            last[tid] = e
+        out.append(e)
+    return out
+
 
 @dataclass
 class TaskAdded:
     task_id: int
+    parent_id: Optional[int] = None
+    order_index: Optional[int] = None
+    status: Optional[str] = None     # None — неизвестен, счётчики пересчитываются запросом
 
 @dataclass
 class TaskUpdated:
     task_id: int
+    # поле -> новое значение; пусто — изменения неизвестны, подписчик перечитывает строку
+    changes: Dict[str, Any] = field(default_factory=dict)
+    # прежние значения изменённых полей (не все издатели их знают)
+    previous: Dict[str, Any] = field(default_factory=dict)
 
 @dataclass
 class TaskDeleted:
     task_id: int
+    parent_id: Optional[int] = None
+    path: Optional[str] = None       # путь удалённого узла — по нему видны бывшие предки
+    # {"total", "done"} удалённого поддерева до удаления; None — неизвестно
+    removed: Optional[Dict[str, int]] = None
 
 @dataclass
 class TaskMoved:
-    task_id: int
\ No newline at end of file
+    task_id: int
+    old_parent_id: Optional[int] = None
+    new_parent_id: Optional[int] = None
+    old_order_index: Optional[int] = None
+    new_order_index: Optional[int] = None
+
+@dataclass
+class TasksReordered:
+    """Новый порядок детей parent_id (ReorderSiblings); сами узлы не переносились."""
+    parent_id: Optional[int]
+    ordered_ids: List[int] = field(default_factory=list)
+
+@dataclass
+class TasksChanged:
+    """События одного EventBus.batch() или такта очереди, доставленные разом после коммита."""
+    events: List[Any] = field(default_factory=list)
+
+    @property
+    def task_ids(self) -> List[int]:
+        ids: List[int] = []
+        for e in self.events:
+            ids.extend(e.ordered_ids if isinstance(e, TasksReordered) else [e.task_id])
+        return list(dict.fromkeys(ids))
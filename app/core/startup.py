@@ -0,0 +1,45 @@
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+
+class StartupTimer:
+    """Разбивка холодного старта по фазам: длительность, время от начала и число новых модулей.
+
+    Фазы с импортами показывают, сколько модулей подтянуто, — как сводка
+    `python -X importtime`, но по шагам запуска, а не по каждому модулю.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self._last = self.t0
+        self._modules = len(sys.modules)
+        self.marks: List[Tuple[str, float, float, int]] = []   # (фаза, мс, мс от старта, модулей)
+
+    def mark(self, name: str):
+        now = time.perf_counter()
+        mods = len(sys.modules)
+        self.marks.append((name, (now - self._last) * 1000, (now - self.t0) * 1000, mods - self._modules))
+        self._last, self._modules = now, mods
+
+    @contextmanager
+    def phase(self, name: str):
+        self.mark_gap()
+        yield
+        self.mark(name)
+
+    def mark_gap(self):
+        """Время между фазами, не попавшее ни в одну (цикл событий и т.п.)."""
+        if (time.perf_counter() - self._last) * 1000 >= 1:
+            self.mark("…")
+
+    def elapsed(self, name: str) -> float:
+        """Время от старта до фазы name, мс (-1, если её ещё не было)."""
+        return next((at for n, _, at, _ in self.marks if n == name), -1.0)
+
+    def report(self) -> str:
+        lines = [f"{'фаза':<22} {'мс':>8} {'от старта':>10} {'модулей':>8}"]
+        for name, ms, at, mods in self.marks:
+            lines.append(f"{name:<22} {ms:>8.1f} {at:>10.1f} {mods:>8}")
+        return "\n".join(lines)
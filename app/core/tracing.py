@@ -0,0 +1,165 @@
+import json
+import threading
+import time
+from contextlib import nullcontext
+from functools import wraps
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+_NULL = nullcontext()
+
+
+class Histogram:
+    """Последние samples длительностей (мс) одного пути спанов; перцентили считаются по запросу."""
+
+    def __init__(self, samples: int = 10_000):
+        self.limit = samples
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._values: List[float] = []
+
+    def add(self, ms: float):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        if len(self._values) < self.limit:
+            self._values.append(ms)
+        else:
+            self._values[self.count % self.limit] = ms   # кольцо: старые значения вытесняются
+
+    def percentile(self, q: float) -> float:
+        if not self._values:
+            return 0.0
+        vals = sorted(self._values)
+        return vals[min(len(vals) - 1, int(q / 100 * len(vals)))]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(self.max_ms, 3),
+            "total_ms": round(self.total_ms, 3),
+        }
+
+
+class Span:
+    """Один замер; вложенные спаны того же потока становятся children."""
+
+    __slots__ = ("tracer", "name", "path", "ms", "children", "usecase", "_t0")
+
+    def __init__(self, tracer: "Tracer", name: str, usecase: bool = False):
+        self.tracer = tracer
+        self.name = name
+        self.usecase = usecase
+        self.path = name
+        self.ms = 0.0
+        self.children: List["Span"] = []
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        if stack:
+            self.path = f"{stack[-1].path}/{self.name}"
+            stack[-1].children.append(self)
+        stack.append(self)
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ms = (time.perf_counter() - self._t0) * 1000
+        stack = self.tracer._stack()
+        stack.pop()
+        self.tracer._record(self, root=not stack)
+        return False
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "ms": round(self.ms, 3),
+            "children": [c.to_dict() for c in self.children],
+        }
+
+
+class Tracer:
+    """Вложенные спаны и гистограммы длительностей по пути «Usecase/метод/…».
+
+    Выключенный трейсер (TT_TRACE=0) отдаёт общий nullcontext — цена вызова span() копеечная.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.last: Optional[Span] = None     # последний завершившийся корневой спан
+        # последний завершившийся usecase — обычно last это одиночный вызов репозитория
+        self.last_usecase: Optional[Span] = None
+        self._hist: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def span(self, name: str):
+        return Span(self, name) if self.enabled else _NULL
+
+    def traced(self, name: Optional[str] = None, usecase: bool = False):
+        """Декоратор: вызов функции — спан (по умолчанию имя — __qualname__).
+
+        usecase=True — спан действия пользователя, попадает в last_usecase.
+        """
+        def deco(fn):
+            label = name or fn.__qualname__
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with Span(self, label, usecase):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return deco
+
+    def histogram(self, path: str) -> Optional[dict]:
+        """Сводка одного пути (см. Histogram.summary) — без сортировки остальных."""
+        with self._lock:
+            hist = self._hist.get(path)
+            return hist.summary() if hist is not None else None
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            return {path: h.summary() for path, h in sorted(self._hist.items())}
+
+    def dump(self, path: Path):
+        data = {
+            "spans": self.summary(),
+            "last": self.last.to_dict() if self.last else None,
+            "last_usecase": self.last_usecase.to_dict() if self.last_usecase else None,
+        }
+        Path(path).write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    def reset(self):
+        with self._lock:
+            self._hist.clear()
+            self.last = self.last_usecase = None
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, span: Span, root: bool):
+        with self._lock:
+            hist = self._hist.get(span.path)
+            if hist is None:
+                hist = self._hist[span.path] = Histogram()
+            hist.add(span.ms)
+            if root:
+                self.last = span
+            if span.usecase:
+                self.last_usecase = span
+
+
+tracer = Tracer(enabled=settings.trace)
+span = tracer.span
+traced = tracer.traced
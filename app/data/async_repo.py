@@ -0,0 +1,37 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Union
+from .repositories import TaskRepository
+
+
+class AsyncTaskRepository:
+    """Асинхронный фасад над TaskRepository.
+
+    Запись — один выделенный поток с очередью: операции выполняются строго
+    по порядку отправки. Чтение — небольшой пул: в WAL читатели не ждут
+    писателя и друг друга. Оба метода возвращают concurrent.futures.Future.
+
+    Чтение не ждёт ранее отправленных записей; если нужен результат после
+    записи — отправьте его через write(). Счётчик незавершённых операций
+    для UI ведёт DbBridge (busy).
+    """
+
+    def __init__(self, repo: TaskRepository, readers: int = 2):
+        self.repo = repo
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tt-db-write")
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="tt-db-read")
+
+    def read(self, fn: Union[str, Callable], *args, **kwargs) -> Future:
+        """fn — имя метода репозитория или callable; выполняется в пуле читателей."""
+        return self._submit(self._readers, fn, args, kwargs)
+
+    def write(self, fn: Union[str, Callable], *args, **kwargs) -> Future:
+        """fn — имя метода репозитория или callable; выполняется в потоке записи."""
+        return self._submit(self._writer, fn, args, kwargs)
+
+    def shutdown(self, wait: bool = True):
+        self._writer.shutdown(wait=wait)
+        self._readers.shutdown(wait=wait)
+
+    def _submit(self, pool: ThreadPoolExecutor, fn, args, kwargs) -> Future:
+        call = getattr(self.repo, fn) if isinstance(fn, str) else fn
+        return pool.submit(call, *args, **kwargs)
@@ -0,0 +1,92 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+from app.core.events import TaskAdded, TaskDeleted, TaskMoved, TaskUpdated, TasksChanged, TasksReordered
+from app.domain.models import TaskRow
+
+
+class RecordCache:
+    """Ограниченный LRU-кэш записей задач (TaskRow) по id (identity map).
+
+    Записи неизменяемы, поэтому отдаются всем читателям без копий. Потокобезопасен:
+    репозиторий зовут и из GUI, и из потоков AsyncTaskRepository.
+
+    epoch растёт при каждой инвалидации; загрузчик запоминает его до запроса
+    и передаёт в put(), чтобы не положить в кэш строку, устаревшую за время чтения.
+    """
+
+    # приоритет подписки на шину: сброс раньше подписчиков, которые перечитывают данные
+    PRIORITY = 100
+
+    def __init__(self, maxsize: int = 20_000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.epoch = 0
+        self._data: "OrderedDict[int, TaskRow]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, task_id: int) -> Optional[TaskRow]:
+        with self._lock:
+            rec = self._data.get(task_id)
+            if rec is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._data.move_to_end(task_id)
+            return rec
+
+    def put(self, rec: TaskRow, epoch: Optional[int] = None):
+        self.put_many([rec], epoch)
+
+    def put_many(self, recs: Iterable[TaskRow], epoch: Optional[int] = None):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                return
+            for rec in recs:
+                self._data[rec.id] = rec
+                self._data.move_to_end(rec.id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, task_id: int):
+        self.invalidate_many((task_id,))
+
+    def invalidate_many(self, ids: Iterable[int]):
+        with self._lock:
+            self.epoch += 1
+            for tid in ids:
+                self._data.pop(tid, None)
+
+    def invalidate_where(self, pred: Callable[[TaskRow], bool]):
+        """Убирает записи по условию — проход по кэшу, O(размера)."""
+        with self._lock:
+            self.epoch += 1
+            for tid in [tid for tid, rec in self._data.items() if pred(rec)]:
+                del self._data[tid]
+
+    def clear(self):
+        with self._lock:
+            self.epoch += 1
+            self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def bind(self, bus):
+        """Инвалидация по событиям EventBus — для записей мимо этого репозитория."""
+        for evt in (TaskAdded, TaskDeleted, TaskMoved, TaskUpdated):
+            bus.subscribe(evt, lambda e: self.invalidate(e.task_id), priority=self.PRIORITY)
+        bus.subscribe(TasksChanged, lambda e: self.invalidate_many(e.task_ids), priority=self.PRIORITY)
+        bus.subscribe(TasksReordered, lambda e: self.invalidate_many(e.ordered_ids), priority=self.PRIORITY)
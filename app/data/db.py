@@ -1,15 +1,149 @@
-﻿from contextlib import contextmanager
+﻿import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
 from sqlmodel import SQLModel, create_engine, Session
 from app.core.config import settings
+from app.domain import models  # noqa: F401  таблицы должны быть в metadata до create_all
+
+log = logging.getLogger(__name__)
 
 _engine = None
+_has_fts = None
 
 def get_engine():
     global _engine
     if _engine is None:
         _engine = create_engine(f"sqlite:///{settings.db_path}", echo=False, connect_args={"check_same_thread": False})
+        if settings.sqlite_tuning:
+            event.listen(_engine, "connect", _apply_pragmas)
+        # хуки нужны и одному логу медленных запросов; общая статистика — только при sql_profile
+        if settings.sql_profile or settings.sql_slow_ms > 0:
+            _hook(_engine)
     return _engine
 
+def sqlite_pragmas() -> dict:
+    """Профиль производительности SQLite из settings (TT_SQLITE_*)."""
+    return {
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "mmap_size": settings.sqlite_mmap_size,
+        "cache_size": settings.sqlite_cache_size,
+        "temp_store": settings.sqlite_temp_store,
+        "busy_timeout": settings.sqlite_busy_timeout,
+    }
+
+def _apply_pragmas(dbapi_conn, _record):
+    cur = dbapi_conn.cursor()
+    try:
+        for name, value in sqlite_pragmas().items():
+            cur.execute(f"PRAGMA {name}={value}")
+    finally:
+        cur.close()
+
+def reset_engine():
+    """Сбрасывает закэшированный engine (например, после смены db_path)."""
+    global _engine, _has_fts, _hooked
+    if _engine is not None:
+        _engine.dispose()
+    _engine = None
+    _has_fts = None
+    _hooked = None
+
+# ------------------- профилирование SQL -------------------
+_hooked = None        # engine, на котором висят хуки cursor_execute
+_profiles: List["QueryStats"] = []   # открытые query_profile() (+ общий при TT_SQL_PROFILE)
+_profiles_lock = threading.Lock()
+
+_SQL_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SQL_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SQL_SPACE = re.compile(r"\s+")
+
+def normalize_sql(sql: str) -> str:
+    """Текст запроса без литералов и с IN (?, ?, …) в одну форму — ключ агрегации."""
+    sql = _SQL_LITERAL.sub("?", sql)
+    sql = _SQL_IN_LIST.sub("(?…)", sql)
+    return _SQL_SPACE.sub(" ", sql).strip()
+
+class QueryStats:
+    """Число и время SQL-запросов, в том числе по нормализованному тексту."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.by_sql: Dict[str, List[float]] = {}   # sql -> [число, сумма мс, максимум мс]
+        self._lock = threading.Lock()
+
+    def record(self, sql: str, ms: float):
+        key = normalize_sql(sql)
+        with self._lock:
+            self.count += 1
+            self.total_ms += ms
+            agg = self.by_sql.setdefault(key, [0, 0.0, 0.0])
+            agg[0] += 1
+            agg[1] += ms
+            agg[2] = max(agg[2], ms)
+
+    def top(self, n: int = 10, by: str = "total") -> List[dict]:
+        """Самые дорогие запросы: by = total | count | max."""
+        col = {"count": 0, "total": 1, "max": 2}[by]
+        with self._lock:
+            items = sorted(self.by_sql.items(), key=lambda kv: kv[1][col], reverse=True)[:n]
+        return [
+            {"sql": sql, "count": c, "total_ms": round(t, 3), "max_ms": round(m, 3)}
+            for sql, (c, t, m) in items
+        ]
+
+    def __repr__(self):
+        return f"QueryStats(count={self.count}, total_ms={self.total_ms:.1f})"
+
+# общая статистика процесса; копится, только когда включён TT_SQL_PROFILE
+query_stats = QueryStats()
+
+@contextmanager
+def query_profile() -> Iterator[QueryStats]:
+    """Считает запросы всех потоков за время блока:
+
+        with query_profile() as q:
+            model.reload()
+        assert q.count <= 1
+    """
+    _hook(get_engine())
+    stats = QueryStats()
+    with _profiles_lock:
+        _profiles.append(stats)
+    try:
+        yield stats
+    finally:
+        with _profiles_lock:
+            _profiles.remove(stats)
+
+def _hook(engine):
+    global _hooked
+    with _profiles_lock:
+        if _hooked is engine:
+            return
+        _hooked = engine
+        if settings.sql_profile and query_stats not in _profiles:
+            _profiles.append(query_stats)
+    event.listen(engine, "before_cursor_execute", _before_execute)
+    event.listen(engine, "after_cursor_execute", _after_execute)
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    # время — на контексте выполнения: упавший запрос (after не вызывается) уходит вместе с ним
+    context.tt_query_start = time.perf_counter()
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    ms = (time.perf_counter() - context.tt_query_start) * 1000
+    for stats in tuple(_profiles):
+        stats.record(statement, ms)
+    if settings.sql_slow_ms > 0 and ms >= settings.sql_slow_ms:
+        log.warning("Медленный запрос %.1f мс: %s", ms, _SQL_SPACE.sub(" ", statement)[:500])
+
 @contextmanager
 def session_scope():
     session = Session(get_engine())
@@ -24,4 +158,80 @@ def session_scope():
 
 def ensure_db():
     engine = get_engine()
-    SQLModel.metadata.create_all(engine)
\ No newline at end of file
+    SQLModel.metadata.create_all(engine)
+    _migrate(engine)
+
+# пути строятся от корней (и от «сирот», чей родитель удалён без cascade)
+_BACKFILL_PATHS = """
+WITH RECURSIVE tree(id, path) AS (
+    SELECT id, '/' || id || '/' FROM task
+    WHERE parent_id IS NULL OR parent_id NOT IN (SELECT id FROM task)
+    UNION ALL
+    SELECT c.id, tree.path || c.id || '/' FROM task c JOIN tree ON c.parent_id = tree.id
+)
+UPDATE task SET path = (SELECT path FROM tree WHERE tree.id = task.id)
+WHERE path IS NULL
+"""
+
+def _migrate(engine):
+    """Дотягивает схему существующей БД до модели: create_all не меняет готовые таблицы."""
+    with engine.begin() as conn:
+        cols = {r[1] for r in conn.exec_driver_sql("PRAGMA table_info(task)")}
+        if not cols:
+            return   # таблицы нет — мигрировать нечего
+        if "path" not in cols:
+            conn.exec_driver_sql("ALTER TABLE task ADD COLUMN path VARCHAR")
+            conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_task_path ON task (path)")
+        if conn.exec_driver_sql("SELECT 1 FROM task WHERE path IS NULL LIMIT 1").first():
+            conn.exec_driver_sql(_BACKFILL_PATHS)
+            # циклы недостижимы от корней — такие узлы становятся корнями своих путей
+            conn.exec_driver_sql("UPDATE task SET path = '/' || id || '/' WHERE path IS NULL")
+        _ensure_fts(conn)
+
+# полнотекстовый индекс: external-content FTS5 над task, синхронизация триггерами
+_FTS_DDL = (
+    """CREATE VIRTUAL TABLE task_fts USING fts5(
+        title, description, category,
+        content='task', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS task_fts_ai AFTER INSERT ON task BEGIN
+        INSERT INTO task_fts(rowid, title, description, category)
+        VALUES (new.id, new.title, new.description, new.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS task_fts_ad AFTER DELETE ON task BEGIN
+        INSERT INTO task_fts(task_fts, rowid, title, description, category)
+        VALUES ('delete', old.id, old.title, old.description, old.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS task_fts_au AFTER UPDATE OF title, description, category ON task BEGIN
+        INSERT INTO task_fts(task_fts, rowid, title, description, category)
+        VALUES ('delete', old.id, old.title, old.description, old.category);
+        INSERT INTO task_fts(rowid, title, description, category)
+        VALUES (new.id, new.title, new.description, new.category);
+    END""",
+)
+
+def _ensure_fts(conn):
+    exists = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'task_fts'"
+    ).first()
+    if exists:
+        return
+    try:
+        for ddl in _FTS_DDL:
+            conn.exec_driver_sql(ddl)
+    except OperationalError:
+        # SQLite собран без FTS5 — поиск останется на LIKE
+        log.warning("FTS5 недоступен, полнотекстовый поиск отключён")
+        return
+    conn.exec_driver_sql("INSERT INTO task_fts(task_fts) VALUES ('rebuild')")
+
+def has_fts() -> bool:
+    """Есть ли в текущей БД индекс task_fts (результат кэшируется до reset_engine)."""
+    global _has_fts
+    if _has_fts is None:
+        with get_engine().connect() as conn:
+            _has_fts = conn.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'task_fts'"
+            ).first() is not None
+    return _has_fts
\ No newline at end of file
@@ -1,44 +1,127 @@
-from typing import List, Optional, Iterable
+import re
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+from typing import Iterable, List, Mapping, Optional, Sequence, Union
+from sqlalchemy import case, delete as sa_delete, func, insert, literal, text, update as sa_update
+from sqlalchemy.orm import aliased
 from sqlmodel import select
-from shutil import copy2
 from datetime import datetime
 from pathlib import Path
-from app.domain.models import Task
-from .db import session_scope
+from app.core.config import settings
+from app.core.tracing import traced
+from app.domain.models import Status, Task, TaskRow
+from .cache import RecordCache
+from .db import get_engine, has_fts, session_scope
+
+
+# поля записи чтения (TaskRow) и соответствующие колонки для select()
+RECORD_FIELDS = TaskRow._fields
+_ROW_COLS = [getattr(Task, f) for f in RECORD_FIELDS]
+
+# project(): колонка задачи или вычисляемое выражение по имени
+_child = aliased(Task)
+_sub = aliased(Task)
+# поддерево узла (с ним самим) — диапазон по индексу path
+_IN_SUBTREE = (_sub.path >= Task.path) & (
+    _sub.path < func.substr(Task.path, 1, func.length(Task.path) - 1).op("||")("0")
+)
+_IS_DONE = case((Task.status == Status.DONE, 1), else_=0)
+PROJECTIONS = {
+    **{f: getattr(Task, f) for f in RECORD_FIELDS},
+    "description_len": func.coalesce(func.length(Task.description), 0),
+    "child_count": select(func.count(_child.id)).where(_child.parent_id == Task.id).scalar_subquery(),
+    # max(): узел без path (не прошёл миграцию) считается сам по себе
+    "sub_total": func.max(select(func.count(_sub.id)).where(_IN_SUBTREE).scalar_subquery(), 1),
+    # статус не в WHERE: иначе SQLite выбирает ix_task_status и перебирает все done вместо диапазона path
+    "sub_done": func.max(
+        select(func.count(case((_sub.status == Status.DONE, 1)))).where(_IN_SUBTREE).scalar_subquery(),
+        _IS_DONE,
+    ),
+}
+_COUNT_FIELDS = ("child_count",)
+# итоги поддерева — диапазон path на каждую строку; только точечно, не для целого уровня
+_ROLLUP_FIELDS = ("sub_total", "sub_done")
+_ANY = object()   # project(): parent_id не задан
+
+# шаг между order_index соседей: вставка/перенос берут середину зазора,
+# поэтому трогают одну строку; когда зазор кончается — rebalance()
+ORDER_GAP = 1024
+# положение узла в дереве: меняется только через move() (и reorder() для порядка)
+STRUCTURAL_FIELDS = frozenset({"parent_id", "path", "order_index"})
+
+
+def _check_fields(fields: Iterable[str]):
+    bad = STRUCTURAL_FIELDS.intersection(fields)
+    if bad:
+        raise ValueError(f"Поля {', '.join(sorted(bad))} меняются через move()")
+
+
+def _key_between(prev: Optional[int], nxt: Optional[int]) -> Optional[int]:
+    """order_index строго между соседями (None — края списка); None, если места нет."""
+    if nxt is None:
+        return (prev or 0) + ORDER_GAP
+    lo = -1 if prev is None else prev   # ключи не уходят в минус
+    if nxt - lo < 2:
+        return None
+    return (lo + nxt) // 2
+
+
+_FTS_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def fts_query(query: str) -> str:
+    """Пользовательский ввод → выражение FTS5 MATCH.
+
+    "фраза в кавычках" ищется целиком, остальные слова — по префиксу;
+    всё экранируется как строки FTS5, поэтому операторы из ввода не исполняются.
+    """
+    parts = []
+    for phrase, word in _FTS_TOKEN.findall(query):
+        term = (phrase or word).replace('"', '""').strip()
+        if not term:
+            continue
+        parts.append(f'"{term}"' if phrase else f'"{term}"*')
+    return " ".join(parts)
 
 
 class TaskRepository:
+    def __init__(self, cache: Optional[RecordCache] = None):
+        # сессия открытого batch() — своя у каждого потока
+        self._local = threading.local()
+        # записи по id; инвалидируется после коммита каждой записи в БД
+        self.cache = cache if cache is not None else RecordCache(settings.record_cache_size)
+
     # CRUD 
+    @traced()
     def add(self, task: Task) -> Task:
-        with session_scope() as s:
+        with self._session() as s:
             oi = self._next_order_index(s, task.parent_id)
             task.order_index = oi
+            parent_path = self._path_of(s, task.parent_id)
             s.add(task)
             s.flush()
+            task.path = f"{parent_path}{task.id}/"
+            s.flush()
             s.refresh(task)
             _ = (task.id, task.parent_id, task.title, task.order_index)
             s.expunge(task)
             return task
 
-    def get(self, task_id: int) -> Optional[Task]:
-        with session_scope() as s:
-            obj = s.get(Task, task_id)
-            if not obj:
-                return None
-            _ = (
-                obj.id,
-                obj.parent_id,
-                obj.title,
-                obj.status,
-                obj.priority,
-                obj.due_at,
-                obj.order_index,
-            )
-            s.expunge(obj)
-            return obj
+    @traced()
+    def get(self, task_id: int) -> Optional[TaskRow]:
+        """Запись задачи через кэш: повторное чтение загруженной строки не ходит в БД."""
+        if not self._in_batch():
+            row = self.cache.get(task_id)
+            if row is not None:
+                return row
+        return self._load_records([task_id]).get(task_id)
 
+    @traced()
     def update(self, task_id: int, **fields) -> Optional[Task]:
-        with session_scope() as s:
+        """Правка полей задачи; parent_id/path/order_index — ValueError (см. move())."""
+        _check_fields(fields)
+        with self._session() as s:
             obj = s.get(Task, task_id)
             if not obj:
                 return None
@@ -58,39 +141,341 @@ class TaskRepository:
                 obj.order_index,
             )
             s.expunge(obj)
-            return obj
+        self.cache.invalidate(task_id)
+        return obj
 
+    @traced()
     def delete(self, task_id: int, cascade: bool = True) -> None:
-        with session_scope() as s:
+        with self._session() as s:
             target = s.get(Task, task_id)
             if not target:
                 return
-            ids_to_delete = [target.id]
+            prefix = target.path
+            # братья не перенумеровываются: в ключах остаётся дыра, порядок прежний
             if cascade:
-                ids_to_delete += [
-                    t.id for t in self._subtree(s, task_id) if t.id != task_id
-                ]
-            for tid in ids_to_delete:
-                obj = s.get(Task, tid)
-                if obj:
-                    s.delete(obj)
-            self._reindex_siblings(s, target.parent_id)
+                tree = self._subtree_cte(task_id)
+                s.exec(
+                    sa_delete(Task)
+                    .where(Task.id.in_(select(tree.c.id)))
+                    .execution_options(synchronize_session="fetch")
+                )
+            else:
+                s.delete(target)
+        if cascade and prefix:
+            self.cache.invalidate_where(lambda r: (r.path or "").startswith(prefix))
+        else:
+            self.cache.invalidate(task_id)
 
+    @traced()
     def move(self, task_id: int, new_parent_id: Optional[int], new_order_index: int) -> None:
-        with session_scope() as s:
+        with self._session() as s:
             obj = s.get(Task, task_id)
             if not obj:
                 return
+            old_path = obj.path
+            new_path = f"{self._path_of(s, new_parent_id)}{obj.id}/"
+            if new_path.startswith(old_path) and new_path != old_path:
+                raise ValueError("Нельзя перенести задачу внутрь её же поддерева")
             obj.parent_id = new_parent_id
             s.add(obj)
             s.flush()
             self._insert_at_index(s, obj, new_order_index)
             s.flush()
+            if new_path != old_path:
+                # переписываем префикс пути у всего поддерева одним UPDATE по индексу
+                s.exec(
+                    sa_update(Task)
+                    .where(*self._path_range(old_path))
+                    .values(path=literal(new_path) + func.substr(Task.path, len(old_path) + 1))
+                    .execution_options(synchronize_session="fetch")
+                )
+        # поддерево сменило пути; у новых братьев мог пройти rebalance
+        self.cache.invalidate_where(
+            lambda r: (r.path or "").startswith(old_path or f"/{task_id}/")
+            or r.parent_id == new_parent_id
+        )
+
+    # ------------------- Batch -------------------
+    @contextmanager
+    def batch(self):
+        """Единица работы: все вызовы репозитория внутри блока — одна транзакция.
+
+            with repo.batch() as b:
+                b.add(...); b.update(...)
+
+        Коммит при выходе, откат при исключении; вложенные batch() ничего не открывают.
+        """
+        if getattr(self._local, "session", None) is not None:
+            yield self
+            return
+        try:
+            with session_scope() as s:
+                self._local.session = s
+                try:
+                    yield self
+                finally:
+                    self._local.session = None
+        finally:
+            # внутри batch кэш не пополняется; всё, что могли прочитать другие потоки, — сбросить
+            self.cache.clear()
+
+    @traced()
+    def add_many(self, tasks: Iterable[Union[Task, Mapping]]) -> List[int]:
+        """Пакетная вставка одним executemany в одной транзакции вместо add() на задачу.
+
+        Принимает Task или dict с полями Task (dict дешевле для больших импортов).
+        order_index назначается в конец списка братьев в порядке следования;
+        переданным Task проставляются id и order_index. Возвращает id в том же порядке.
+        """
+        tasks = list(tasks)
+        if not tasks:
+            return []
+        now = datetime.utcnow()
+        defaults = {
+            "parent_id": None,
+            "description": None,
+            "status": Status.TODO,
+            "priority": 3,
+            "due_at": None,
+            "category": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        rows = [
+            t.model_dump(exclude={"id"}) if isinstance(t, Task) else {**defaults, **t}
+            for t in tasks
+        ]
+        with self._session() as s:
+            # id раздаём сами (max+1...) — тогда вставка идёт одним executemany
+            # без RETURNING; гонку с другим писателем SQLite отклонит на записи
+            first_id = (s.exec(select(func.max(Task.id))).one() or 0) + 1
+            ids = list(range(first_id, first_id + len(rows)))
+            parents = {r["parent_id"] for r in rows}
+            next_oi = self._next_order_indexes(s, parents)
+            paths = self._paths_of(s, parents)
+            for r, tid in zip(rows, ids):
+                r["id"] = tid
+                r["order_index"] = next_oi[r["parent_id"]]
+                r["path"] = f"{paths[r['parent_id']]}{tid}/"
+                next_oi[r["parent_id"]] += ORDER_GAP
+            s.connection().execute(insert(Task.__table__), rows)
+        for t, r, tid in zip(tasks, rows, ids):
+            if isinstance(t, Task):
+                t.id, t.order_index = tid, r["order_index"]
+        return ids
+
+    @traced()
+    def update_many(
+        self, updates: Union[Mapping[int, dict], Iterable[tuple[int, dict]]]
+    ) -> None:
+        """Пакетное обновление по первичному ключу: {task_id: {поле: значение}}.
+
+        Как и update(), не трогает положение в дереве: parent_id/path/order_index — ValueError.
+        """
+        items = list(updates.items() if isinstance(updates, Mapping) else updates)
+        for _, fields in items:
+            _check_fields(fields)
+        self._write_rows(items)
+
+    def _write_rows(self, items: Iterable[tuple[int, dict]]) -> None:
+        now = datetime.utcnow()
+        rows = [{**fields, "id": tid, "updated_at": now} for tid, fields in items]
+        if not rows:
+            return
+        with self._session() as s:
+            s.exec(sa_update(Task), params=rows)
+        self.cache.invalidate_many(r["id"] for r in rows)
+
+    @traced()
+    def delete_many(self, task_ids: Iterable[int], cascade: bool = True) -> None:
+        """Удаляет несколько задач (с поддеревьями) одним DELETE."""
+        ids = list(task_ids)
+        if not ids:
+            return
+        with self._session() as s:
+            doomed = select(self._subtree_cte(ids).c.id) if cascade else ids
+            s.exec(
+                sa_delete(Task)
+                .where(Task.id.in_(doomed))
+                .execution_options(synchronize_session="fetch")
+            )
+        self.cache.clear()
 
     # UI helper
-    def children_plain(self, parent_id: Optional[int]) -> list[dict]:
-        """Возвращает список dict без ORM, отсортированный по order_index."""
-        with session_scope() as s:
+    @traced()
+    def children_plain(self, parent_id: Optional[int], with_counts: bool = False) -> list[dict]:
+        """Возвращает список dict без ORM, отсортированный по order_index.
+
+        with_counts=True добавляет child_count — число прямых детей каждой записи
+        (коррелированный подзапрос по индексу parent_id, без загрузки внуков).
+        Итоги поддеревьев сюда не входят: они сканируют ветви — см. rollups().
+        """
+        with self._session() as s:
+            return self._plain_rows(s, Task.parent_id == parent_id, with_counts)
+
+    @traced()
+    def project(
+        self,
+        columns: Sequence[str],
+        *,
+        parent_id: Union[int, None, object] = _ANY,
+        ids: Optional[Iterable[int]] = None,
+        as_dict: bool = False,
+    ) -> list:
+        """Только нужные колонки одним запросом — для представлений.
+
+        columns — имена из PROJECTIONS: поля TaskRow и вычисляемые description_len,
+        child_count, sub_total, sub_done. Фильтры: parent_id (дети; None — корни)
+        и/или ids; без них — вся таблица в порядке (parent_id, order_index, id).
+        Возвращает строки-кортежи (поля доступны и по имени) или dict при as_dict.
+        """
+        unknown = [c for c in columns if c not in PROJECTIONS]
+        if unknown:
+            raise ValueError(f"Неизвестные колонки: {', '.join(unknown)}")
+        conds = []
+        order = [Task.order_index, Task.id]
+        if parent_id is not _ANY:
+            conds.append(Task.parent_id == parent_id)
+        else:
+            order.insert(0, Task.parent_id)
+        if ids is not None:
+            conds.append(Task.id.in_(list(ids)))
+        with self._session() as s:
+            return self._project(s, columns, conds, order, as_dict)
+
+    @traced()
+    def records(self, task_ids: Iterable[int]) -> dict[int, TaskRow]:
+        """Записи по id: найденные в кэше + один запрос IN на промахи."""
+        ids = list(dict.fromkeys(task_ids))
+        out: dict[int, TaskRow] = {}
+        if not self._in_batch():
+            for tid in ids:
+                rec = self.cache.get(tid)
+                if rec is not None:
+                    out[tid] = rec
+        missing = [tid for tid in ids if tid not in out]
+        if missing:
+            out.update(self._load_records(missing))
+        return out
+
+    @traced()
+    def get_plain(self, task_id: int) -> Optional[dict]:
+        """Одна запись в формате children_plain(with_counts=True) + sub_total/sub_done."""
+        with self._session() as s:
+            rows = self._plain_rows(s, Task.id == task_id, with_counts=True, with_rollups=True)
+            return rows[0] if rows else None
+
+    @traced()
+    def rollups(self, task_ids: Iterable[int]) -> dict[int, tuple[int, int]]:
+        """id -> (sub_total, sub_done): задач и выполненных в поддереве с узлом.
+
+        Один запрос; каждая строка — диапазон по индексу path, поэтому звать
+        для видимых узлов, а не для всего уровня.
+        """
+        ids = list(task_ids)
+        if not ids:
+            return {}
+        with self._session() as s:
+            rows = self._project(s, ("id", *_ROLLUP_FIELDS), [Task.id.in_(ids)], [Task.id])
+        return {tid: (total, done) for tid, total, done in rows}
+
+    def sibling_position(self, task_id: int) -> Optional[int]:
+        """Позиция задачи среди братьев (0-based) в порядке order_index, id."""
+        sib = aliased(Task)
+        with self._session() as s:
+            obj = s.get(Task, task_id)
+            if not obj:
+                return None
+            return s.exec(
+                select(func.count(sib.id)).where(
+                    sib.parent_id.is_not_distinct_from(obj.parent_id),
+                    (sib.order_index < obj.order_index)
+                    | ((sib.order_index == obj.order_index) & (sib.id < obj.id)),
+                )
+            ).one()
+
+    @traced()
+    def tree_plain(self) -> List[TaskRow]:
+        """Все задачи одним запросом, упорядоченные по (parent_id, order_index).
+
+        Записи попадают и в кэш — до его ёмкости.
+        """
+        return self._rows(select(*_ROW_COLS).order_by(Task.parent_id, Task.order_index, Task.id))
+
+    # ------------------- Queries -------------------
+    def siblings(self, parent_id: Optional[int]) -> List[TaskRow]:
+        return self._rows(
+            select(*_ROW_COLS)
+            .where(Task.parent_id == parent_id)
+            .order_by(Task.order_index, Task.id)
+        )
+
+    def children(self, parent_id: Optional[int]) -> List[TaskRow]:
+        return self.siblings(parent_id)
+
+    def all_roots(self) -> List[TaskRow]:
+        return self.siblings(None)
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[TaskRow]:
+        """Задачи, подходящие под запрос, по убыванию релевантности (см. search_plain)."""
+        ids = [r["id"] for r in self.search_plain(query, limit=limit)]
+        found = self.records(ids)
+        return [found[tid] for tid in ids if tid in found]
+
+    @traced()
+    def search_plain(
+        self,
+        query: str,
+        limit: Optional[int] = 50,
+        offset: int = 0,
+        mark: tuple[str, str] = ("[", "]"),
+    ) -> list[dict]:
+        """Полнотекстовый поиск по title/description/category через FTS5.
+
+        Слова ищутся по префиксу («кла» найдёт «Клауд»), "фраза в кавычках" —
+        целиком. Результат отсортирован по bm25 (совпадение в title весит больше)
+        и содержит title_hl/snippet с подсветкой mark. Без FTS5 — LIKE по подстроке.
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        if not has_fts():
+            return self._search_like(query, limit, offset)
+        sql = text(
+            """
+            SELECT t.id, t.parent_id, t.title, t.status, t.priority, t.due_at,
+                   t.order_index, t.category, t.path,
+                   highlight(task_fts, 0, :open, :close) AS title_hl,
+                   coalesce(snippet(task_fts, 1, :open, :close, '…', 12), '') AS snippet
+            FROM task_fts JOIN task t ON t.id = task_fts.rowid
+            WHERE task_fts MATCH :match
+            ORDER BY bm25(task_fts, 10.0, 1.0, 3.0), t.id
+            LIMIT :limit OFFSET :offset
+            """
+        ).columns(due_at=Task.__table__.c.due_at.type)   # datetime, как в _search_like и остальных чтениях
+        params = {
+            "match": match,
+            "open": mark[0],
+            "close": mark[1],
+            "limit": -1 if limit is None else limit,
+            "offset": offset,
+        }
+        with self._session() as s:
+            rows = s.connection().execute(sql, params).mappings().all()
+            return [dict(r) for r in rows]
+
+    def subtree(self, root_id: int) -> List[TaskRow]:
+        """Всё поддерево (включая корень) в порядке обхода, одним запросом."""
+        tree = self._subtree_cte(root_id)
+        return self._rows(
+            select(*_ROW_COLS).join(tree, Task.id == tree.c.id).order_by(tree.c.sort_key)
+        )
+
+    @traced()
+    def subtree_plain(self, root_id: int) -> list[dict]:
+        """Поддерево в виде dict (с depth и sort_key), в порядке обхода."""
+        with self._session() as s:
+            tree = self._subtree_cte(root_id)
             rows = s.exec(
                 select(
                     Task.id,
@@ -100,9 +485,12 @@ class TaskRepository:
                     Task.priority,
                     Task.due_at,
                     Task.order_index,
+                    Task.category,
+                    tree.c.depth,
+                    tree.c.sort_key,
                 )
-                .where(Task.parent_id == parent_id)
-                .order_by(Task.order_index)
+                .join(tree, Task.id == tree.c.id)
+                .order_by(tree.c.sort_key)
             ).all()
             return [
                 {
@@ -113,142 +501,321 @@ class TaskRepository:
                     "priority": r[4],
                     "due_at": r[5],
                     "order_index": r[6],
+                    "category": r[7],
+                    "depth": r[8],
+                    "sort_key": r[9],
                 }
                 for r in rows
             ]
 
-            rows = s.exec(
-    select(
-        Task.id, Task.parent_id, Task.title,
-        Task.status, Task.priority, Task.due_at, Task.order_index,
-        Task.category
-    ).where(Task.parent_id == parent_id).order_by(Task.order_index)
-        ).all()
-        return [
-    {
-        "id": r[0], "parent_id": r[1], "title": r[2],
-        "status": r[3], "priority": r[4], "due_at": r[5],
-        "order_index": r[6], "category": r[7],
-    }
-    for r in rows
-]
-        
+    @traced()
+    def rebalance(self, parent_id: Optional[int]) -> None:
+        """Равномерно раздвигает order_index детей parent_id (порядок не меняется)."""
+        with self._session() as s:
+            self._rebalance(s, parent_id)
+        self.cache.invalidate_where(lambda r: r.parent_id == parent_id)
 
-    # ------------------- Queries -------------------
-    def siblings(self, parent_id: Optional[int]) -> List[Task]:
-        with session_scope() as s:
-            res = s.exec(
-                select(Task)
-                .where(Task.parent_id == parent_id)
-                .order_by(Task.order_index)
-            ).all()
-            for t in res:
-                _ = (
-                    t.id,
-                    t.parent_id,
-                    t.title,
-                    t.status,
-                    t.priority,
-                    t.due_at,
-                    t.order_index,
-                )
-                s.expunge(t)
-            return res
+    @traced()
+    def reorder(self, parent_id: Optional[int], ordered_ids: Sequence[int]) -> dict[int, int]:
+        """Задаёт порядок детей parent_id по списку: order_index = (i + 1) * ORDER_GAP.
 
-    def children(self, parent_id: Optional[int]) -> List[Task]:
-        return self.siblings(parent_id)
+        id чужих родителей пропускаются. Возвращает {id: новый order_index} записанных строк.
+        """
+        current = self.records(ordered_ids)
+        new = {
+            tid: (i + 1) * ORDER_GAP
+            for i, tid in enumerate(ordered_ids)
+            if tid in current and current[tid].parent_id == parent_id
+        }
+        self._write_rows((tid, {"order_index": oi}) for tid, oi in new.items())
+        return new
 
-    def all_roots(self) -> List[Task]:
-        return self.siblings(None)
+    # ------------------- Hierarchy (materialized path) -------------------
+    def descendants_plain(self, task_id: int) -> list[dict]:
+        """Все потомки (без самого узла) — один диапазонный скан по индексу path."""
+        with self._session() as s:
+            path = self._path_or_none(s, task_id)
+            if path is None:
+                return []
+            _, below = self._path_range(path)
+            return self._plain_rows(s, (Task.path > path) & below)
 
-    def search(self, query: str) -> List[Task]:
-        like = f"%{query}%"
-        with session_scope() as s:
-            res = s.exec(
-                select(Task).where(
-                    (Task.title.like(like)) | (Task.description.like(like))
-                )
-            ).all()
-            for t in res:
-                _ = (
-                    t.id,
-                    t.parent_id,
-                    t.title,
-                    t.status,
-                    t.priority,
-                    t.due_at,
-                    t.order_index,
-                )
-                s.expunge(t)
-            return res
+    @traced()
+    def ancestor_ids(self, task_id: int) -> List[int]:
+        """id предков от корня к родителю — разбор пути, без обхода дерева."""
+        with self._session() as s:
+            path = self._path_or_none(s, task_id)
+        if path is None:
+            return []
+        return [int(x) for x in path.strip("/").split("/")[:-1]]
 
-    def subtree(self, root_id: int) -> List[Task]:
-        with session_scope() as s:
-            items = list(self._subtree(s, root_id))
-            for t in items:
-                _ = (
-                    t.id,
-                    t.parent_id,
-                    t.title,
-                    t.status,
-                    t.priority,
-                    t.due_at,
-                    t.order_index,
-                )
-                s.expunge(t)
-            return items
+    def ancestors_plain(self, task_id: int) -> list[dict]:
+        """Предки от корня к родителю."""
+        ids = self.ancestor_ids(task_id)
+        if not ids:
+            return []
+        with self._session() as s:
+            by_id = {r["id"]: r for r in self._plain_rows(s, Task.id.in_(ids))}
+        return [by_id[i] for i in ids if i in by_id]
+
+    def depth(self, task_id: int) -> Optional[int]:
+        """Глубина узла (корень — 0)."""
+        with self._session() as s:
+            path = self._path_or_none(s, task_id)
+        return None if path is None else path.count("/") - 2
 
+    def subtree_count(self, task_id: int) -> int:
+        """Размер поддерева вместе с самим узлом."""
+        with self._session() as s:
+            path = self._path_or_none(s, task_id)
+            if path is None:
+                return 0
+            return s.exec(
+                select(func.count(Task.id)).where(*self._path_range(path))
+            ).one()
+
+    @traced()
+    def subtree_stats(self, task_id: Optional[int] = None, now: Optional[datetime] = None) -> dict:
+        """total/done/overdue по поддереву (вместе с узлом) или по всей БД (task_id=None).
+
+        Один агрегирующий запрос; поддерево — диапазон по индексу path.
+        """
+        now = now or datetime.now()
+        with self._session() as s:
+            q = select(
+                func.count(Task.id),
+                func.coalesce(func.sum(case((Task.status == Status.DONE, 1), else_=0)), 0),
+                func.coalesce(
+                    func.sum(case(((Task.due_at < now) & (Task.status != Status.DONE), 1), else_=0)),
+                    0,
+                ),
+            )
+            if task_id is not None:
+                path = self._path_or_none(s, task_id)
+                if path is None:
+                    return {"total": 0, "done": 0, "overdue": 0}
+                q = q.where(*self._path_range(path))
+            total, done, overdue = s.exec(q).one()
+            return {"total": total, "done": done, "overdue": overdue}
+
+    @traced()
+    def overdue_count(self, now: Optional[datetime] = None) -> int:
+        """Число просроченных незакрытых задач во всей БД — диапазон по индексу due_at."""
+        now = now or datetime.now()
+        with self._session() as s:
+            q = select(func.count(Task.id)).where(Task.due_at < now, Task.status != Status.DONE)
+            return s.exec(q).one()
+
+    @traced()
+    def is_descendant(self, task_id: int, ancestor_id: int) -> bool:
+        """Лежит ли task_id внутри поддерева ancestor_id (включая сам ancestor_id)."""
+        with self._session() as s:
+            paths = dict(
+                s.exec(
+                    select(Task.id, Task.path).where(Task.id.in_([task_id, ancestor_id]))
+                ).all()
+            )
+        path, prefix = paths.get(task_id), paths.get(ancestor_id)
+        return bool(path and prefix and path.startswith(prefix))
+
+    @traced()
     def backup(self, dest_dir: Path) -> Path:
+        """Консистентная копия БД через sqlite backup API (учитывает WAL)."""
         dest_dir.mkdir(parents=True, exist_ok=True)
-        src = Path("tasks.db")
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
         dst = dest_dir / f"tasks_{ts}.db"
-        copy2(src, dst)
+        raw = get_engine().raw_connection()
+        try:
+            with closing(sqlite3.connect(dst)) as out:
+                raw.driver_connection.backup(out)
+        finally:
+            raw.close()
         return dst
 
     # ------------------- Internal helpers -------------------
-    def _next_order_index(self, s, parent_id: Optional[int]) -> int:
+    @contextmanager
+    def _session(self):
+        # внутри batch() — общая сессия без коммита, иначе своя транзакция
+        s = getattr(self._local, "session", None)
+        if s is not None:
+            yield s
+            return
+        with session_scope() as s:
+            yield s
+
+    def _in_batch(self) -> bool:
+        return getattr(self._local, "session", None) is not None
+
+    def _rows(self, stmt) -> List[TaskRow]:
+        """Core-выборка колонок _ROW_COLS прямо в TaskRow, без ORM-объектов; пополняет кэш."""
+        epoch = self.cache.epoch
+        with self._session() as s:
+            rows = list(map(TaskRow._make, s.connection().execute(stmt)))
+        self._remember(rows, epoch)
+        return rows
+
+    def _load_records(self, ids: List[int]) -> dict[int, TaskRow]:
+        out: dict[int, TaskRow] = {}
+        for i in range(0, len(ids), 500):   # держимся ниже лимита параметров SQLite
+            out.update((r.id, r) for r in self._rows(select(*_ROW_COLS).where(Task.id.in_(ids[i:i + 500]))))
+        return out
+
+    def _remember(self, rows: List[TaskRow], epoch: int):
+        """Кладёт записи в кэш (не больше его ёмкости); внутри batch — нет."""
+        if self._in_batch() or self.cache.maxsize <= 0:
+            return
+        self.cache.put_many(rows[-self.cache.maxsize:], epoch)
+
+    def _path_or_none(self, s, task_id: int) -> Optional[str]:
+        return s.exec(select(Task.path).where(Task.id == task_id)).first()
+
+    def _path_of(self, s, parent_id: Optional[int]) -> str:
+        """Префикс пути для детей parent_id ("/" для корней)."""
+        if parent_id is None:
+            return "/"
+        return self._path_or_none(s, parent_id) or "/"
+
+    def _paths_of(self, s, task_ids: Iterable[Optional[int]]) -> dict:
+        """То же, что _path_of, для набора id — одним запросом."""
+        task_ids = set(task_ids)
+        res = {tid: "/" for tid in task_ids}
+        ids = [tid for tid in task_ids if tid is not None]
+        if ids:
+            for tid, path in s.exec(select(Task.id, Task.path).where(Task.id.in_(ids))).all():
+                res[tid] = path or "/"
+        return res
+
+    @staticmethod
+    def _path_range(prefix: str):
+        # все пути с данным префиксом: [prefix, prefix с последним '/' → '0')
+        return Task.path >= prefix, Task.path < prefix[:-1] + "0"
+
+    def _next_order_indexes(self, s, parent_ids: Iterable[Optional[int]]) -> dict:
+        """Следующий свободный order_index для каждого родителя — одним запросом."""
+        parent_ids = set(parent_ids)
+        res = {pid: ORDER_GAP for pid in parent_ids}
+        cond = Task.parent_id.in_([p for p in parent_ids if p is not None])
+        if None in parent_ids:
+            cond = cond | Task.parent_id.is_(None)
         rows = s.exec(
-            select(Task.order_index)
-            .where(Task.parent_id == parent_id)
-            .order_by(Task.order_index.desc())
+            select(Task.parent_id, func.max(Task.order_index))
+            .where(cond)
+            .group_by(Task.parent_id)
         ).all()
-        return (rows[0] if rows else 0) + 1 if rows else 0
+        for pid, mx in rows:
+            res[pid] = mx + ORDER_GAP
+        return res
 
-    def _reindex_siblings(self, s, parent_id: Optional[int]):
-        sibs = s.exec(
-            select(Task)
-            .where(Task.parent_id == parent_id)
-            .order_by(Task.order_index)
-        ).all()
-        for i, t in enumerate(sibs):
-            if t.order_index != i:
-                t.order_index = i
-                s.add(t)
+    def _next_order_index(self, s, parent_id: Optional[int]) -> int:
+        return self._next_order_indexes(s, {parent_id})[parent_id]
+
+    def _rebalance(self, s, parent_id: Optional[int], exclude_id: Optional[int] = None) -> int:
+        """Раздвигает ключи братьев на ORDER_GAP (первый — ORDER_GAP); вернёт их число."""
+        q = select(Task.id).where(Task.parent_id == parent_id)
+        if exclude_id is not None:
+            q = q.where(Task.id != exclude_id)
+        ids = s.exec(q.order_by(Task.order_index, Task.id)).all()
+        if ids:
+            s.exec(
+                sa_update(Task),
+                params=[{"id": tid, "order_index": (i + 1) * ORDER_GAP} for i, tid in enumerate(ids)],
+            )
+        return len(ids)
 
     def _insert_at_index(self, s, obj: Task, idx: int):
-        sibs = s.exec(
-            select(Task)
-            .where(Task.parent_id == obj.parent_id)
-            .order_by(Task.order_index)
-        ).all()
-        idx = max(0, min(idx, len(sibs)))
-        for i in range(idx, len(sibs)):
-            sibs[i].order_index = i + 1
-            s.add(sibs[i])
-        obj.order_index = idx
+        """Ставит obj на позицию idx среди братьев, меняя только его order_index.
+
+        Ключ — середина между соседями; если зазор исчерпан, братья раздвигаются
+        через _rebalance (редкий O(N) случай).
+        """
+        idx = max(0, idx)
+        sibs = select(Task.order_index).where(
+            Task.parent_id == obj.parent_id, Task.id != obj.id
+        )
+        prev = nxt = None
+        if idx == 0:
+            nxt = s.exec(sibs.order_by(Task.order_index, Task.id).limit(1)).first()
+        else:
+            keys = s.exec(
+                sibs.order_by(Task.order_index, Task.id).offset(idx - 1).limit(2)
+            ).all()
+            if keys:
+                prev = keys[0]
+                nxt = keys[1] if len(keys) > 1 else None
+            else:  # позиция за концом списка — в конец
+                prev = s.exec(select(func.max(sibs.subquery().c.order_index))).one()
+        key = _key_between(prev, nxt)
+        if key is None:
+            n = self._rebalance(s, obj.parent_id, exclude_id=obj.id)
+            idx = min(idx, n)
+            key = _key_between(
+                idx * ORDER_GAP if idx else None,
+                (idx + 1) * ORDER_GAP if idx < n else None,
+            )
+        obj.order_index = key
         s.add(obj)
 
-    def _subtree(self, s, root_id: int) -> Iterable[Task]:
-        """Рекурсивная выборка поддерева."""
-        root = s.get(Task, root_id)
-        if not root:
-            return []
-        yield root
-        children = s.exec(
-            select(Task)
-            .where(Task.parent_id == root_id)
-            .order_by(Task.order_index)
-        ).all()
-        for ch in children:
-            yield from self._subtree(s, ch.id)
+    def _search_like(self, query: str, limit: Optional[int], offset: int) -> list[dict]:
+        like = f"%{query}%"
+        with self._session() as s:
+            rows = s.exec(
+                select(
+                    Task.id, Task.parent_id, Task.title, Task.status, Task.priority,
+                    Task.due_at, Task.order_index, Task.category, Task.path,
+                )
+                .where(
+                    Task.title.like(like)
+                    | Task.description.like(like)
+                    | Task.category.like(like)
+                )
+                .order_by(Task.id)
+                .offset(offset)
+                .limit(limit)
+            ).all()
+        keys = (
+            "id", "parent_id", "title", "status", "priority",
+            "due_at", "order_index", "category", "path",
+        )
+        return [{**dict(zip(keys, r)), "title_hl": r[2], "snippet": ""} for r in rows]
+
+    def _project(self, s, columns: Sequence[str], conds, order, as_dict: bool = False) -> list:
+        q = select(*(PROJECTIONS[c].label(c) for c in columns)).where(*conds).order_by(*order)
+        rows = s.connection().execute(q).all()
+        if as_dict:
+            return [dict(zip(columns, r)) for r in rows]
+        return rows
+
+    def _plain_rows(self, s, where, with_counts: bool = False, with_rollups: bool = False) -> list[dict]:
+        epoch = self.cache.epoch
+        cols = RECORD_FIELDS + _COUNT_FIELDS if with_counts else RECORD_FIELDS
+        if with_rollups:
+            cols += _ROLLUP_FIELDS
+        out = self._project(s, cols, [where], [Task.order_index, Task.id], as_dict=True)
+        self._remember([TaskRow.from_mapping(d) for d in out], epoch)
+        return out
+
+    @staticmethod
+    def _sort_segment(order_index, task_id):
+        # сегмент ключа сортировки: порядок среди братьев + id для стабильности
+        return func.printf("%012d.%012d/", order_index, task_id)
+
+    def _subtree_cte(self, root_id: Union[int, Iterable[int]]):
+        """WITH RECURSIVE от одного или нескольких корней: id, parent_id, depth, sort_key."""
+        roots = [root_id] if isinstance(root_id, int) else list(root_id)
+        base = (
+            select(
+                Task.id.label("id"),
+                Task.parent_id.label("parent_id"),
+                literal(0).label("depth"),
+                self._sort_segment(Task.order_index, Task.id).label("sort_key"),
+            )
+            .where(Task.id.in_(roots))
+            .cte("subtree", recursive=True)
+        )
+        step = select(
+            Task.id,
+            Task.parent_id,
+            base.c.depth + 1,
+            base.c.sort_key.op("||")(self._sort_segment(Task.order_index, Task.id)),
+        ).join(base, Task.parent_id == base.c.id)
+        return base.union_all(step)
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Optional
+from typing import Mapping, NamedTuple, Optional
 from datetime import datetime
 from sqlmodel import SQLModel, Field
 
@@ -23,6 +23,31 @@ class Task(SQLModel, table=True):
     category: Optional[str] = Field(default=None, index=True)
 
     order_index: int = Field(default=0, index=True)
+    # материализованный путь "/<id корня>/.../<id>/": поддерево = диапазон по индексу
+    path: Optional[str] = Field(default=None, index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+
+class TaskRow(NamedTuple):
+    """Неизменяемая запись задачи для чтения: кортеж прямо из Core select().
+
+    В разы легче экземпляра Task (нет pydantic/ORM-состояния); новые значения —
+    через _replace().
+    """
+    id: int
+    parent_id: Optional[int]
+    title: str
+    description: Optional[str]
+    status: str
+    priority: Optional[int]
+    due_at: Optional[datetime]
+    category: Optional[str]
+    order_index: int
+    path: Optional[str]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_mapping(cls, m: Mapping) -> "TaskRow":
+        return cls._make(m.get(f) for f in cls._fields)
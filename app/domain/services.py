@@ -1,4 +1,6 @@
-﻿from typing import Iterable
+﻿from dataclasses import dataclass
+from typing import Iterable, List, Optional
+from app.core.events import TaskAdded, TaskDeleted, TaskMoved, TaskUpdated, TasksChanged, TasksReordered
 from .models import Task, Status
 
 def branch_progress(tasks: Iterable[Task]) -> float:
@@ -6,4 +8,141 @@ def branch_progress(tasks: Iterable[Task]) -> float:
     if not items:
         return 0.0
     done = sum(1 for t in items if t.status == Status.DONE)
-    return done / len(items)
\ No newline at end of file
+    return done / len(items)
+
+
+def path_ids(path: Optional[str]) -> List[int]:
+    """id из материализованного пути, от корня к самому узлу."""
+    if not path:
+        return []
+    return [int(x) for x in path.strip("/").split("/")]
+
+
+@dataclass(frozen=True)
+class NodeStats:
+    total: int
+    done: int
+    overdue: int
+
+    @property
+    def progress(self) -> float:
+        return self.done / self.total if self.total else 0.0
+
+
+class NodeStatsService:
+    """Счётчики total/done/overdue по поддеревьям (None — вся БД) с кэшем.
+
+    Значение по узлу считается одним агрегирующим запросом (repo.subtree_stats)
+    и кэшируется; события EventBus сбрасывают только узел и цепочку его предков.
+    Итог по всей БД держится счётчиками total/done, которые события сдвигают
+    на дельту; overdue зависит от времени и берётся индексным repo.overdue_count.
+    Полный пересчёт — только если событие без данных или пакет больше BATCH_CLEAR.
+    """
+
+    # поля задачи, от которых зависят счётчики
+    STATS_FIELDS = frozenset({"status", "due_at"})
+    # больше событий в TasksChanged — дешевле сбросить кэш целиком
+    BATCH_CLEAR = 200
+    # сброс кэша раньше виджетов, которые читают stats() в своих обработчиках
+    PRIORITY = 50
+
+    def __init__(self, repo, bus=None):
+        self.repo = repo
+        self._cache: dict[Optional[int], NodeStats] = {}
+        # [total, done] по всей БД; None — не посчитаны
+        self._totals: Optional[list[int]] = None
+        if bus is not None:
+            bus.subscribe(TaskAdded, self._on_added, priority=self.PRIORITY)
+            bus.subscribe(TaskUpdated, self._on_updated, priority=self.PRIORITY)
+            bus.subscribe(TaskDeleted, self._on_deleted, priority=self.PRIORITY)
+            bus.subscribe(TaskMoved, self._on_moved, priority=self.PRIORITY)
+            bus.subscribe(TasksChanged, self._on_batch, priority=self.PRIORITY)
+
+    def stats(self, task_id: Optional[int] = None) -> NodeStats:
+        if task_id is None:
+            return self._global_stats()
+        cached = self._cache.get(task_id)
+        if cached is None:
+            cached = NodeStats(**self.repo.subtree_stats(task_id))
+            self._cache[task_id] = cached
+        return cached
+
+    def progress(self, task_id: Optional[int] = None) -> float:
+        return self.stats(task_id).progress
+
+    def _global_stats(self) -> NodeStats:
+        if self._totals is None:
+            st = self.repo.subtree_stats(None)
+            self._totals = [st["total"], st["done"]]
+            return NodeStats(**st)
+        total, done = self._totals
+        return NodeStats(total, done, self.repo.overdue_count())
+
+    def _shift(self, total: int, done: int):
+        if self._totals is not None:
+            self._totals[0] += total
+            self._totals[1] += done
+
+    def invalidate(self, task_id: int):
+        """Сбрасывает узел и его предков — O(глубины)."""
+        for tid in (task_id, *self.repo.ancestor_ids(task_id)):
+            self._cache.pop(tid, None)
+
+    def clear(self):
+        self._cache.clear()
+        self._totals = None
+
+    def _drop(self, ids: Iterable[Optional[int]]):
+        for tid in ids:
+            self._cache.pop(tid, None)
+
+    def _on_added(self, event: TaskAdded):
+        if event.status is None:
+            self._totals = None
+        else:
+            self._shift(1, int(event.status == Status.DONE))
+        if self._cache:
+            self.invalidate(event.task_id)
+
+    def _on_updated(self, event: TaskUpdated):
+        # правка названия/описания счётчики не меняет
+        if event.changes and not self.STATS_FIELDS & event.changes.keys():
+            return
+        if "status" in event.changes and "status" in event.previous:
+            was = event.previous["status"] == Status.DONE
+            self._shift(0, int(event.changes["status"] == Status.DONE) - was)
+        elif not event.changes or "status" in event.changes:
+            self._totals = None
+        if self._cache:
+            self.invalidate(event.task_id)
+
+    def _on_deleted(self, event: TaskDeleted):
+        if event.removed is None:
+            self._totals = None
+        else:
+            self._shift(-event.removed["total"], -event.removed["done"])
+        # закэшированных потомков не перечислить, а id удалённых строк SQLite может выдать снова
+        self._cache.clear()
+
+    def _on_moved(self, event: TaskMoved):
+        # перенос общий итог не меняет
+        if not self._cache:
+            return
+        old_parent = event.old_parent_id
+        if old_parent is not None:
+            self._drop([old_parent, *self.repo.ancestor_ids(old_parent)])
+        self.invalidate(event.task_id)
+
+    def _on_batch(self, event: TasksChanged):
+        if len(event.events) > self.BATCH_CLEAR:
+            self.clear()
+            return
+        handlers = {
+            TaskAdded: self._on_added,
+            TaskUpdated: self._on_updated,
+            TaskDeleted: self._on_deleted,
+            TaskMoved: self._on_moved,
+            TasksReordered: lambda e: None,   # порядок братьев счётчики не меняет
+        }
+        for e in event.events:
+            handlers[type(e)](e)
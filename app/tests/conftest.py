@@ -0,0 +1,26 @@
+import os
+import pytest
+from app.core import config as cfg
+from app.data import db
+from app.data.repositories import TaskRepository
+
+
+@pytest.fixture(autouse=True)
+def _fresh_engine():
+    db.reset_engine()
+    yield
+    db.reset_engine()
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.setattr(cfg.settings, "db_path", tmp_path / "test.db", raising=False)
+    db.ensure_db()
+    return TaskRepository()
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    widgets = pytest.importorskip("PySide6.QtWidgets")
+    return widgets.QApplication.instance() or widgets.QApplication([])
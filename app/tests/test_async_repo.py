@@ -0,0 +1,43 @@
+import threading
+import pytest
+from app.data.async_repo import AsyncTaskRepository
+from app.domain.models import Task
+
+
+def test_writes_are_serialized_and_reads_run_in_pool(repo):
+    db = AsyncTaskRepository(repo)
+    root = db.write("add", Task(parent_id=None, title="Root")).result()
+    futs = [db.write("add", Task(parent_id=root.id, title=f"c{i}")) for i in range(20)]
+    ids = [f.result().id for f in futs]
+    assert ids == sorted(ids)  # порядок отправки = порядок выполнения
+
+    seen = set()
+    def titles(pid):
+        seen.add(threading.current_thread().name)
+        return [r["title"] for r in repo.children_plain(pid)]
+    assert db.read(titles, root.id).result() == [f"c{i}" for i in range(20)]
+    assert seen and all(n.startswith("tt-db-read") for n in seen)
+    with pytest.raises(ValueError):
+        db.write("move", root.id, root.id, 0).result()
+    db.shutdown()
+
+
+def test_bridge_delivers_results_in_gui_thread(repo, qapp):
+    from PySide6.QtCore import QEventLoop, QTimer
+    from app.ui.viewmodels.db_bridge import DbBridge
+
+    bridge = DbBridge(AsyncTaskRepository(repo))
+    busy, got, errors = [], [], []
+    bridge.busy_changed.connect(busy.append)
+    t = repo.add(Task(parent_id=None, title="T"))
+    bridge.read("get_plain", t.id, on_done=lambda r: got.append((r["title"], threading.current_thread())))
+    bridge.write("move", t.id, t.id, 0, on_error=errors.append)
+
+    loop = QEventLoop()
+    bridge.busy_changed.connect(lambda n: n == 0 and loop.quit())
+    QTimer.singleShot(5000, loop.quit)
+    loop.exec()
+    bridge.shutdown()
+    assert got == [("T", threading.main_thread())]
+    assert [type(e) for e in errors] == [ValueError]
+    assert busy[:2] == [1, 2] and busy[-1] == 0
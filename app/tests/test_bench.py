@@ -0,0 +1,28 @@
+from app.bench import data
+from app.bench.__main__ import parse_size
+from app.bench.common import compare
+
+
+def test_data_suite_runs_on_small_tree():
+    results = data.run("balanced", 120, ops=3)
+    ops = {r["op"] for r in results}
+    assert {"bulk_import", "children", "tree_load", "subtree", "search", "move", "cascade_delete"} <= ops
+    assert all(r["nodes"] == 120 and r["median_ms"] >= 0 for r in results)
+
+
+def test_compare_flags_regressions():
+    row = {"suite": "data", "shape": "wide", "nodes": 10, "op": "get"}
+    old = {"results": [{**row, "median_ms": 1.0}]}
+    new = {"results": [{**row, "median_ms": 2.0}]}
+    (d,) = compare(old, new, threshold=1.5)
+    assert d["regression"] and d["ratio"] == 2.0
+    assert parse_size("1M") == 1_000_000 and parse_size("2.5k") == 2500
+
+
+def test_ui_suite_reports_sql_counts(qapp):
+    from app.bench import ui
+
+    results = {r["op"]: r for r in ui.run("balanced", 60, ops=2)}
+    assert {"reload", "traverse", "traverse_lazy", "select", "typing_burst"} <= set(results)
+    assert results["reload"]["sql_per_op"] == 1      # дерево целиком — один запрос
+    assert results["traverse"]["sql_per_op"] == 0    # обход загруженной модели не ходит в БД
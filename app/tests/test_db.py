@@ -0,0 +1,71 @@
+import sqlite3
+import pytest
+from sqlalchemy import text
+from app.data.db import get_engine
+from app.domain.models import Task
+
+
+def test_performance_pragmas_applied(repo):
+    with get_engine().connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+
+
+def test_backup_includes_uncheckpointed_wal(repo, tmp_path):
+    repo.add(Task(parent_id=None, title="Root"))
+    dst = repo.backup(tmp_path / "backups")
+    with sqlite3.connect(dst) as conn:
+        assert conn.execute("SELECT title FROM task").fetchall() == [("Root",)]
+
+
+def test_query_profile_counts_and_aggregates(repo):
+    from app.data.db import normalize_sql, query_profile
+
+    a = repo.add(Task(parent_id=None, title="A"))
+    repo.cache.clear()
+    with query_profile() as q:
+        repo.get(a.id)
+        repo.get(a.id)   # вторая — из кэша записей
+        repo.children_plain(None)
+    assert q.count == 2
+    assert sum(row["count"] for row in q.top()) == 2
+    assert normalize_sql("SELECT * FROM t WHERE id IN (?, ?, ?) AND x = 'a''b'") == \
+        "SELECT * FROM t WHERE id IN (?…) AND x = ?"
+
+
+def test_slow_queries_are_logged(repo, monkeypatch, caplog):
+    from app.core import config as cfg
+    from app.data.db import query_profile
+
+    monkeypatch.setattr(cfg.settings, "sql_slow_ms", 1e-6)
+    with caplog.at_level("WARNING", logger="app.data.db"), query_profile():
+        repo.children_plain(None)
+    assert "Медленный запрос" in caplog.text
+
+
+def test_slow_log_works_without_profiling(repo, monkeypatch, caplog):
+    from app.core import config as cfg
+    from app.data import db
+    from app.data.repositories import TaskRepository
+
+    monkeypatch.setattr(cfg.settings, "sql_profile", False)
+    monkeypatch.setattr(cfg.settings, "sql_slow_ms", 1e-6)
+    db.reset_engine()
+    before = db.query_stats.count
+    with caplog.at_level("WARNING", logger="app.data.db"):
+        TaskRepository().children_plain(None)
+    assert "Медленный запрос" in caplog.text
+    assert db.query_stats.count == before        # общая статистика — только с TT_SQL_PROFILE
+
+
+def test_failed_statement_leaves_no_timing_state(repo):
+    from sqlalchemy.exc import OperationalError
+    from app.data import db
+
+    with db.query_profile() as prof, db.get_engine().connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM no_such_table"))
+        conn.execute(text("SELECT 1"))
+        assert "tt_query_start" not in conn.info
+    assert prof.count == 1
@@ -0,0 +1,146 @@
+import pytest
+from app.core.events import (
+    EventBus, TaskAdded, TaskDeleted, TaskMoved, TaskUpdated, TasksChanged, TasksReordered, coalesce,
+)
+from app.domain.models import Task
+from app.usecases.move_task import MoveTask, MoveTaskInput
+from app.usecases.update_task import UpdateTask, UpdateTaskInput
+
+
+def _collect(bus):
+    got = []
+    for evt in (TaskAdded, TaskUpdated, TaskDeleted, TaskMoved, TasksChanged, TasksReordered):
+        bus.subscribe(evt, got.append)
+    return got
+
+
+def test_events_carry_changes_and_parents(repo):
+    bus = EventBus()
+    got = _collect(bus)
+    a = repo.add(Task(parent_id=None, title="A"))
+    b = repo.add(Task(parent_id=None, title="B"))
+    c = repo.add(Task(parent_id=a.id, title="c"))
+    UpdateTask(repo, bus).execute(UpdateTaskInput(c.id, {"title": "C"}))
+    MoveTask(repo, bus).execute(MoveTaskInput(c.id, b.id, 0))
+    assert got[0] == TaskUpdated(c.id, {"title": "C"}, {"title": "c"})
+    moved = got[1]
+    assert (moved.old_parent_id, moved.new_parent_id) == (a.id, b.id)
+    assert moved.new_order_index == repo.get(c.id).order_index
+
+
+def test_batch_delivers_one_tasks_changed_after_exit(repo):
+    bus = EventBus()
+    got = _collect(bus)
+    with bus.batch(), repo.batch() as b:
+        t = b.add(Task(parent_id=None, title="x"))
+        bus.emit(TaskAdded(t.id))
+        bus.emit(TaskUpdated(t.id, {"title": "y"}))
+        assert got == []
+    assert len(got) == 1 and isinstance(got[0], TasksChanged)
+    assert got[0].task_ids == [t.id]
+
+
+def test_batch_drops_events_on_error():
+    bus = EventBus()
+    got = _collect(bus)
+    with pytest.raises(RuntimeError):
+        with bus.batch():
+            bus.emit(TaskAdded(1))
+            raise RuntimeError
+    assert got == []
+
+
+def test_coalesce_merges_updates():
+    events = [
+        TaskUpdated(1, {"title": "a"}), TaskUpdated(1, {"status": "done"}),
+        TaskAdded(2), TaskAdded(2), TaskUpdated(1, {"title": "b"}),
+    ]
+    assert coalesce(events) == [
+        TaskUpdated(1, {"title": "a", "status": "done"}), TaskAdded(2), TaskUpdated(1, {"title": "b"}),
+    ]
+
+
+def test_priority_and_weak_subscribers():
+    bus = EventBus()
+    order = []
+
+    class Widget:
+        def on_event(self, e):
+            order.append("widget")
+
+    w = Widget()
+    bus.subscribe(TaskAdded, w.on_event, weak=True)
+    bus.subscribe(TaskAdded, lambda e: order.append("cache"), priority=100)
+    bus.emit(TaskAdded(1))
+    assert order == ["cache", "widget"]
+
+    del w
+    order.clear()
+    bus.emit(TaskAdded(2))
+    assert order == ["cache"]
+    assert len(bus._subs[TaskAdded]) == 1
+
+
+def test_queued_delivery_dedupes_per_tick():
+    wakes = []
+    bus = EventBus(scheduler=lambda: wakes.append(1))
+    got = _collect(bus)
+    bus.emit(TaskUpdated(1, {"status": "done"}))
+    bus.emit(TaskAdded(2))
+    bus.emit(TaskAdded(2))
+    bus.emit(TaskUpdated(1, {"status": "done"}))
+    assert got == [] and len(wakes) == 1
+    assert bus.flush() == 2
+    # несколько событий такта — одной пачкой, как batch()
+    assert got == [TasksChanged([TaskUpdated(1, {"status": "done"}), TaskAdded(2)])]
+    bus.emit(TaskAdded(3))
+    bus.flush()
+    assert got[-1] == TaskAdded(3)
+
+
+def test_event_pump_delivers_on_qt_loop(qapp):
+    from app.ui.viewmodels.event_pump import EventPump
+
+    bus = EventBus()
+    pump = EventPump(bus)
+    got = _collect(bus)
+    for i in range(3):
+        bus.emit(TaskAdded(i))
+    assert got == []
+    qapp.processEvents()
+    assert [e.task_id for e in got[0].events] == [0, 1, 2] and pump.flushes == 1
+    pump.stop()
+    bus.emit(TaskAdded(9))
+    assert got[-1] == TaskAdded(9)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_reorder_siblings_with_uneven_keys_reorders_model(repo, qapp, lazy):
+    from PySide6.QtCore import QPersistentModelIndex
+    from app.ui.viewmodels.tree_vm import TaskTreeModel
+    from app.usecases.reorder_siblings import ReorderSiblings, ReorderSiblingsInput
+
+    root = repo.add(Task(parent_id=None, title="Root"))
+    a, b, c, d = (repo.add(Task(parent_id=root.id, title=t)) for t in "abcd")
+    repo.move(d.id, new_parent_id=root.id, new_order_index=1)   # ключи: a 1024, d 1536, b 2048, c 3072
+    assert [t.title for t in repo.children(root.id)] == ["a", "d", "b", "c"]
+    assert repo.get(b.id).order_index == 2048                     # строка в кэше
+
+    bus = EventBus()
+    got = _collect(bus)
+    model = TaskTreeModel(repo, lazy=lazy)
+    bus.subscribe(TasksReordered, model.apply_event)
+    root_idx = model.index(0, 0)
+    model.fetchMore(root_idx)
+    kept = QPersistentModelIndex(model.index(2, 0, root_idx))      # b
+    resets = []
+    model.modelReset.connect(lambda: resets.append(1))
+
+    # b сохраняет ключ 2048, но меняет место
+    ReorderSiblings(repo, bus).execute(ReorderSiblingsInput(root.id, [c.id, b.id, a.id, d.id]))
+    assert [t.title for t in repo.children(root.id)] == ["c", "b", "a", "d"]
+    assert repo.get(a.id).order_index == 3 * 1024
+    assert got == [TasksReordered(root.id, [c.id, b.id, a.id, d.id])]
+    titles = [model.data(model.index(r, 0, root_idx)) for r in range(model.rowCount(root_idx))]
+    assert titles == ["c", "b", "a", "d"] and resets == []
+    assert kept.row() == 1
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+from app.core.events import EventBus, TaskAdded, TaskUpdated
+from app.domain.models import Status, Task
+from app.domain.services import NodeStats, NodeStatsService
+
+
+def test_subtree_stats_and_cache_invalidation(repo):
+    past = datetime.now() - timedelta(days=1)
+    root = repo.add(Task(parent_id=None, title="Root"))
+    a = repo.add(Task(parent_id=root.id, title="A", status=Status.DONE))
+    b = repo.add(Task(parent_id=root.id, title="B", due_at=past))
+    other = repo.add(Task(parent_id=None, title="Other", status=Status.DONE, due_at=past))
+
+    assert repo.subtree_stats(root.id) == {"total": 3, "done": 1, "overdue": 1}
+    assert repo.subtree_stats(None) == {"total": 4, "done": 2, "overdue": 1}
+
+    bus = EventBus()
+    svc = NodeStatsService(repo, bus)
+    assert svc.stats(root.id).progress == 1 / 3
+    assert svc.stats(other.id).total == 1
+
+    repo.update(b.id, status=Status.DONE)
+    assert svc.stats(root.id).done == 1          # закэшировано
+    bus.emit(TaskUpdated(b.id))
+    assert svc.stats(root.id).done == 2
+    assert svc.stats(None).overdue == 0
+    assert other.id in svc._cache               # чужие узлы не сбрасываются
+
+    c = repo.add(Task(parent_id=a.id, title="C"))
+    bus.emit(TaskAdded(c.id))
+    assert svc.stats(root.id).total == 4
+    assert svc.stats(a.id).total == 2
+
+
+def test_global_counters_follow_events_without_full_scan(repo, monkeypatch):
+    from app.usecases.add_task import AddTask, AddTaskInput
+    from app.usecases.delete_task import DeleteTask, DeleteTaskInput
+    from app.usecases.toggle_status import ToggleStatus, ToggleStatusInput
+
+    bus = EventBus()
+    svc = NodeStatsService(repo, bus)
+    root = AddTask(repo, bus).execute(AddTaskInput(None, "Root"))
+    assert svc.stats(None) == NodeStats(1, 0, 0)
+
+    # после первого подсчёта общий итог — только дельты событий
+    monkeypatch.setattr(repo, "subtree_stats", _forbidden_full_scan(repo.subtree_stats))
+    child = AddTask(repo, bus).execute(AddTaskInput(root.id, "Child"))
+    ToggleStatus(repo, bus).execute(ToggleStatusInput(child.id))
+    assert svc.stats(None) == NodeStats(2, 1, 0)
+
+    DeleteTask(repo, bus).execute(DeleteTaskInput(root.id, cascade=True))
+    assert svc.stats(None) == NodeStats(0, 0, 0)
+
+    bus.emit(TaskUpdated(root.id))               # изменения неизвестны — пересчёт
+    monkeypatch.undo()
+    assert svc.stats(None) == NodeStats(0, 0, 0)
+
+
+def _forbidden_full_scan(orig):
+    def subtree_stats(task_id=None, now=None):
+        assert task_id is not None, "полный пересчёт по всей БД"
+        return orig(task_id, now)
+    return subtree_stats
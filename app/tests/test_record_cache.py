@@ -0,0 +1,51 @@
+import pytest
+from app.data.cache import RecordCache
+from app.domain.models import Status, Task, TaskRow
+from app.usecases.toggle_status import ToggleStatus, ToggleStatusInput
+
+
+def _row(task_id):
+    return TaskRow.from_mapping({"id": task_id, "title": str(task_id)})
+
+
+def test_lru_eviction_and_stale_put():
+    c = RecordCache(maxsize=2)
+    c.put_many([_row(1), _row(2)])
+    assert c.get(1).title == "1"
+    c.put(_row(3))                    # вытесняет 2 — к нему дольше не обращались
+    assert c.get(2) is None and c.get(3) is not None
+    epoch = c.epoch
+    c.invalidate(3)
+    c.put(_row(3), epoch)             # прочитано до инвалидации — не кладём
+    assert c.get(3) is None
+    assert c.stats() == {"size": 1, "hits": 2, "misses": 2, "hit_rate": 0.5}
+
+
+def test_loaded_rows_are_served_from_cache(repo, monkeypatch):
+    root = repo.add(Task(parent_id=None, title="Root", description="d"))
+    child = repo.add(Task(parent_id=root.id, title="Child"))
+    repo.tree_plain()
+    monkeypatch.setattr(repo, "_session", lambda: pytest.fail("обращение к БД"))
+    assert repo.get(root.id).description == "d"
+    assert repo.records([root.id, child.id]).keys() == {root.id, child.id}
+    assert repo.cache.hits == 3
+
+
+def test_writes_invalidate_cached_records(repo):
+    root = repo.add(Task(parent_id=None, title="Root"))
+    child = repo.add(Task(parent_id=root.id, title="Child"))
+    other = repo.add(Task(parent_id=None, title="Other"))
+    repo.tree_plain()
+
+    ToggleStatus(repo, None).execute(ToggleStatusInput(child.id))
+    assert repo.get(child.id).status == Status.DONE
+    repo.move(root.id, other.id, 0)
+    assert repo.get(child.id).path == f"/{other.id}/{root.id}/{child.id}/"
+    with pytest.raises(RuntimeError):
+        with repo.batch():
+            repo.update(other.id, title="X")
+            assert repo.get(other.id).title == "X"
+            raise RuntimeError
+    assert repo.get(other.id).title == "Other"
+    repo.delete(root.id)
+    assert repo.get(child.id) is None
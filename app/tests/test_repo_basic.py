@@ -1,6 +1,6 @@
 ﻿from app.data.db import ensure_db
 from app.data.repositories import TaskRepository
-from app.domain.models import Task
+from app.domain.models import Task, TaskRow
 
 def test_crud_cycle(tmp_path, monkeypatch):
     from app.core import config as cfg
@@ -21,4 +21,21 @@ def test_crud_cycle(tmp_path, monkeypatch):
     assert repo.get(a.id).parent_id is None
 
     repo.delete(root.id, cascade=True)
-    assert repo.get(root.id) is None
\ No newline at end of file
+    assert repo.get(root.id) is None
+
+
+def test_read_paths_return_task_rows(repo):
+    root = repo.add(Task(parent_id=None, title="Root", description="про клауд"))
+    child = repo.add(Task(parent_id=root.id, title="Child"))
+    reads = [
+        [repo.get(root.id)],
+        repo.children(root.id),
+        repo.all_roots(),
+        repo.subtree(root.id),
+        repo.search("клауд"),
+        repo.tree_plain(),
+    ]
+    for rows in reads:
+        assert rows and all(type(r) is TaskRow for r in rows)
+    assert repo.get(child.id).path == f"/{root.id}/{child.id}/"
+    assert repo.get(child.id).created_at is not None
@@ -0,0 +1,49 @@
+import pytest
+from app.data.repositories import ORDER_GAP
+from app.domain.models import Task
+
+
+def test_add_many_assigns_ids_and_order(repo):
+    root = repo.add(Task(parent_id=None, title="Root"))
+    repo.add(Task(parent_id=root.id, title="first"))
+    added = [Task(parent_id=root.id, title=f"T{i}") for i in range(2)]
+    ids = repo.add_many(
+        added + [{"parent_id": root.id, "title": "T2"}, {"title": "Top"}]
+    )
+    assert [t.id for t in added] == ids[:2]
+    assert [t.order_index for t in added] == [2 * ORDER_GAP, 3 * ORDER_GAP]
+    assert [t.title for t in repo.children(root.id)] == ["first", "T0", "T1", "T2"]
+    t2 = repo.get(ids[2])
+    assert (t2.status, t2.priority, t2.order_index) == ("todo", 3, 4 * ORDER_GAP)
+    assert t2.created_at is not None
+    assert repo.get(ids[3]).order_index == 2 * ORDER_GAP
+
+
+def test_update_and_delete_many(repo):
+    root = repo.add(Task(parent_id=None, title="Root"))
+    a, b, c = repo.add_many([{"parent_id": root.id, "title": x} for x in "abc"])
+    child = repo.add(Task(parent_id=a, title="a1"))
+    repo.update_many({a: {"title": "A"}, b: {"status": "done", "priority": 1}})
+    assert repo.get(a).title == "A"
+    assert (repo.get(b).status, repo.get(b).priority) == ("done", 1)
+
+    repo.delete_many([a, b])
+    assert repo.get(child.id) is None
+    assert [t.title for t in repo.children(root.id)] == ["c"]
+
+
+def test_batch_is_one_transaction(repo):
+    root = repo.add(Task(parent_id=None, title="Root"))
+    with pytest.raises(RuntimeError):
+        with repo.batch() as b:
+            b.add(Task(parent_id=root.id, title="x"))
+            b.update(root.id, title="changed")
+            raise RuntimeError
+    assert repo.children(root.id) == []
+    assert repo.get(root.id).title == "Root"
+
+    with repo.batch() as b:
+        t = b.add(Task(parent_id=root.id, title="x"))
+        b.move(t.id, new_parent_id=None, new_order_index=0)
+        b.delete(root.id)
+    assert [r.title for r in repo.all_roots()] == ["x"]
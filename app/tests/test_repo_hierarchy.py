@@ -0,0 +1,87 @@
+import sqlite3
+from contextlib import closing
+import pytest
+from app.core import config as cfg
+from app.data import db
+from app.data.repositories import TaskRepository
+from app.domain.models import Task
+from app.usecases.move_task import MoveTask, MoveTaskInput
+
+
+def test_paths_follow_add_and_move(repo):
+    root = repo.add(Task(parent_id=None, title="Root"))
+    a = repo.add(Task(parent_id=root.id, title="A"))
+    a1 = repo.add(Task(parent_id=a.id, title="A1"))
+    (b,) = repo.add_many([{"parent_id": root.id, "title": "B"}])
+    assert repo.get(a1.id).path == f"/{root.id}/{a.id}/{a1.id}/"
+
+    repo.move(a.id, new_parent_id=b, new_order_index=0)
+    assert repo.get(a1.id).path == f"/{root.id}/{b}/{a.id}/{a1.id}/"
+    assert repo.ancestor_ids(a1.id) == [root.id, b, a.id]
+    assert [r["title"] for r in repo.ancestors_plain(a1.id)] == ["Root", "B", "A"]
+    assert repo.depth(a1.id) == 3
+    assert repo.subtree_count(root.id) == 4
+    assert {r["title"] for r in repo.descendants_plain(b)} == {"A", "A1"}
+    assert repo.is_descendant(a1.id, root.id)
+    assert not repo.is_descendant(root.id, a1.id)
+
+
+def test_move_into_own_subtree_is_rejected(repo):
+    root = repo.add(Task(parent_id=None, title="Root"))
+    child = repo.add(Task(parent_id=root.id, title="Child"))
+    with pytest.raises(ValueError):
+        MoveTask(repo, None).execute(MoveTaskInput(root.id, child.id, 0))
+    with pytest.raises(ValueError):
+        repo.move(root.id, root.id, 0)
+    assert repo.get(root.id).parent_id is None
+
+
+# схема до материализованных путей и FTS
+_LEGACY_SCHEMA = """
+CREATE TABLE task (
+    id INTEGER PRIMARY KEY, parent_id INTEGER REFERENCES task(id), title VARCHAR NOT NULL,
+    description VARCHAR, status VARCHAR NOT NULL, priority INTEGER, due_at DATETIME,
+    category VARCHAR, order_index INTEGER NOT NULL, created_at DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL
+)
+"""
+
+
+def test_existing_db_is_migrated(tmp_path, monkeypatch):
+    db_file = tmp_path / "legacy.db"
+    rows = [(1, None, "Учёба"), (2, 1, "ДевОпс"), (3, 2, "Kubernetes"), (4, None, "Дом")]
+    with closing(sqlite3.connect(db_file)) as conn, conn:
+        conn.execute(_LEGACY_SCHEMA)
+        conn.executemany(
+            "INSERT INTO task VALUES (?, ?, ?, '', 'todo', 3, NULL, NULL, ?, "
+            "'2024-01-01 00:00:00', '2024-01-01 00:00:00')",
+            [(tid, parent, title, tid * 1024) for tid, parent, title in rows],
+        )
+    monkeypatch.setattr(cfg.settings, "db_path", db_file, raising=False)
+    db.ensure_db()
+    repo = TaskRepository()
+    assert repo.get(3).path == "/1/2/3/"
+    assert repo.get(4).path == "/4/"
+    assert repo.ancestor_ids(3) == [1, 2]
+    # существующие строки попадают в полнотекстовый индекс при миграции
+    for tid, _, title in rows:
+        assert tid in {h["id"] for h in repo.search_plain(f'"{title}"')}
+
+
+def test_ensure_db_creates_schema_in_fresh_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(cfg.settings, "db_path", tmp_path / "new.db", raising=False)
+    db.ensure_db()
+    assert TaskRepository().children_plain(None) == []
+
+
+def test_update_rejects_structural_fields(repo):
+    a = repo.add(Task(parent_id=None, title="A"))
+    b = repo.add(Task(parent_id=None, title="B"))
+    c = repo.add(Task(parent_id=a.id, title="c"))
+    with pytest.raises(ValueError):
+        repo.update(c.id, parent_id=b.id)
+    with pytest.raises(ValueError):
+        repo.update_many({c.id: {"path": "/x/"}})
+    row = repo.get(c.id)
+    assert (row.parent_id, row.path) == (a.id, f"/{a.id}/{c.id}/")
+    assert repo.is_descendant(c.id, a.id) and not repo.is_descendant(c.id, b.id)
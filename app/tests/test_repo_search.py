@@ -0,0 +1,40 @@
+from app.data.repositories import fts_query
+from app.domain.models import Task
+
+
+def test_fts_query_escapes_and_prefixes():
+    assert fts_query('кла  "дев опс" a"b OR') == '"кла"* "дев опс" "a""b"* "OR"*'
+    assert fts_query('  ""  ') == ""
+
+
+def test_search_ranked_prefix_phrase_and_sync(repo):
+    a = repo.add(Task(parent_id=None, title="Клауд Компьютинг", description="облака"))
+    b = repo.add(Task(parent_id=None, title="Заметки", description="про клауд и девопс"))
+    repo.add(Task(parent_id=None, title="Другое", description="ничего"))
+
+    hits = repo.search_plain("клау")
+    assert [h["id"] for h in hits] == [a.id, b.id]  # совпадение в title выше
+    assert hits[0]["title_hl"] == "[Клауд] Компьютинг"
+    assert "[клауд]" in hits[1]["snippet"]
+    assert [t.id for t in repo.search('"и девопс"')] == [b.id]
+    assert repo.search_plain('"девопс и"') == []
+
+    repo.update(b.id, description="пусто", category="Работа")
+    assert [h["id"] for h in repo.search_plain("клауд")] == [a.id]
+    assert [h["id"] for h in repo.search_plain("раб")] == [b.id]
+    repo.delete(a.id)
+    assert repo.search_plain("компьют") == []
+    assert len(repo.search_plain("", limit=5)) == 0
+
+
+def test_search_paths_return_same_types(repo, monkeypatch):
+    from datetime import datetime
+    from app.data import repositories
+
+    due = datetime(2025, 10, 24, 14, 42, 42, 893000)
+    repo.add(Task(parent_id=None, title="Клауд", due_at=due))
+    (fts,) = repo.search_plain("клауд")
+    monkeypatch.setattr(repositories, "has_fts", lambda: False)
+    (like,) = repo.search_plain("Клауд")
+    assert fts["due_at"] == like["due_at"] == due
+    assert {k: type(v) for k, v in fts.items()} == {k: type(v) for k, v in like.items()}
@@ -0,0 +1,71 @@
+import pytest
+from app.domain.models import Task
+
+
+def _tree(repo):
+    root = repo.add(Task(parent_id=None, title="Root"))
+    a = repo.add(Task(parent_id=root.id, title="A"))
+    b = repo.add(Task(parent_id=root.id, title="B"))
+    a1 = repo.add(Task(parent_id=a.id, title="A1"))
+    other = repo.add(Task(parent_id=None, title="Other"))
+    return root, a, b, a1, other
+
+
+def test_subtree_preorder(repo):
+    root, a, b, a1, _ = _tree(repo)
+    assert [t.title for t in repo.subtree(root.id)] == ["Root", "A", "A1", "B"]
+    rows = repo.subtree_plain(root.id)
+    assert [(r["title"], r["depth"]) for r in rows] == [
+        ("Root", 0), ("A", 1), ("A1", 2), ("B", 1)
+    ]
+    assert repo.subtree(10_000) == []
+
+
+def test_cascade_delete_keeps_other_branches(repo):
+    root, a, b, a1, other = _tree(repo)
+    repo.delete(a.id, cascade=True)
+    assert repo.get(a1.id) is None
+    assert [t.title for t in repo.subtree(root.id)] == ["Root", "B"]
+    assert [t.title for t in repo.children(root.id)] == ["B"]
+    repo.delete(root.id)
+    assert [t.title for t in repo.all_roots()] == ["Other"]
+
+
+def test_gap_ordering_touches_one_row_until_rebalance(repo):
+    from app.data.repositories import ORDER_GAP
+
+    root = repo.add(Task(parent_id=None, title="Root"))
+    kids = [repo.add(Task(parent_id=root.id, title=str(i))) for i in range(3)]
+    before = {t.id: t.order_index for t in repo.children(root.id)}
+
+    repo.move(kids[2].id, new_parent_id=root.id, new_order_index=0)
+    after = {t.id: t.order_index for t in repo.children(root.id)}
+    assert [t.title for t in repo.children(root.id)] == ["2", "0", "1"]
+    assert {k: v for k, v in after.items() if before[k] != v}.keys() == {kids[2].id}
+
+    # многократная вставка в одну точку исчерпывает зазор и вызывает rebalance
+    for _ in range(12):
+        repo.move(kids[1].id, new_parent_id=root.id, new_order_index=1)
+        repo.move(kids[0].id, new_parent_id=root.id, new_order_index=1)
+    assert [t.title for t in repo.children(root.id)] == ["2", "0", "1"]
+
+    repo.rebalance(root.id)
+    keys = [t.order_index for t in repo.children(root.id)]
+    assert keys == [ORDER_GAP, 2 * ORDER_GAP, 3 * ORDER_GAP]
+
+
+def test_project_loads_only_requested_columns(repo):
+    root = repo.add(Task(parent_id=None, title="Root", category="Учёба", description="abc"))
+    repo.add(Task(parent_id=root.id, title="A", status="done"))
+    repo.add(Task(parent_id=root.id, title="B"))
+
+    (row,) = repo.project(["id", "category", "description_len", "child_count"], parent_id=None)
+    assert tuple(row) == (root.id, "Учёба", 3, 2)
+    assert row.category == "Учёба"
+    kids = repo.project(["title", "updated_at"], parent_id=root.id, as_dict=True)
+    assert [k["title"] for k in kids] == ["A", "B"] and kids[0]["updated_at"] is not None
+    assert repo.project(["sub_total", "sub_done"], ids=[root.id]) == [(3, 1)]
+    assert [r.title for r in repo.project(["title"])] == ["Root", "A", "B"]
+    assert repo.children_plain(None)[0]["category"] == "Учёба"
+    with pytest.raises(ValueError):
+        repo.project(["nope"])
@@ -0,0 +1,54 @@
+import pytest
+from app.core.events import EventBus
+from app.domain.models import Task
+
+pytest.importorskip("PySide6")
+
+
+def _wait_finished(qapp, controller):
+    from PySide6.QtCore import QEventLoop, QTimer
+
+    loop = QEventLoop()
+    controller.finished.connect(loop.quit)
+    QTimer.singleShot(5000, loop.quit)
+    loop.exec()
+
+
+def _visible(view, parent=None):
+    from PySide6.QtCore import QModelIndex
+
+    parent = parent or QModelIndex()
+    m = view.model()
+    return [
+        (m.data(m.index(r, 0, parent)), _visible(view, m.index(r, 0, parent)))
+        for r in range(m.rowCount(parent))
+    ]
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_search_filters_tree_and_expands_ancestors(repo, qapp, monkeypatch, lazy):
+    from app.core import config as cfg
+    from app.ui.views.task_tree import TaskTree
+
+    monkeypatch.setattr(cfg.settings, "tree_lazy", lazy)
+    root = repo.add(Task(parent_id=None, title="Учёба"))
+    mid = repo.add(Task(parent_id=root.id, title="Курсы"))
+    repo.add(Task(parent_id=mid.id, title="Клауд Компьютинг"))
+    repo.add(Task(parent_id=root.id, title="ДевОпс"))
+    repo.add(Task(parent_id=None, title="Дом"))
+
+    tree = TaskTree(repo, EventBus())
+    tree.search.page_size = 1
+    tree.set_search("клауд")
+    _wait_finished(qapp, tree.search)
+    assert _visible(tree) == [("Учёба", [("Курсы", [("Клауд Компьютинг", [])])])]
+    assert tree.isExpanded(tree.model().index(0, 0))
+
+    tree.set_search("д")
+    tree.set_search("до")  # предыдущий запрос устаревает, не дойдя до выдачи
+    _wait_finished(qapp, tree.search)
+    assert _visible(tree) == [("Дом", [])]
+
+    tree.set_search("")
+    assert [t for t, _ in _visible(tree)] == ["Учёба", "Дом"]
+    tree.search.wait()
@@ -0,0 +1,46 @@
+import time
+import pytest
+
+pytest.importorskip("PySide6")
+
+
+def test_window_builds_workspace_after_start(repo, qapp):
+    from app.ui.main_window import MainWindow
+
+    w = MainWindow()
+    assert w.workspace is None   # до start() — только заглушка, без БД
+    w.start()
+    assert not w.workspace.toolbar.isEnabled()   # правки — только после загрузки дерева
+    loaded = []
+    w.workspace.loaded.connect(lambda: loaded.append(1))
+    deadline = time.monotonic() + 5
+    while not loaded and time.monotonic() < deadline:
+        qapp.processEvents()
+    assert loaded
+    assert w.workspace.toolbar.isEnabled()
+    model = w.workspace.tree.model_
+    assert [item.row.title for item in model.root_items] == ["Учёба"]   # сидер пустой БД
+    assert [m[0] for m in w.startup.marks][-1] == "дерево"
+    w.close()
+
+
+def test_unpainted_window_starts_by_timer(repo, qapp, monkeypatch):
+    from app.ui.main_window import MainWindow
+
+    monkeypatch.setattr(MainWindow, "START_FALLBACK_MS", 0)
+    w = MainWindow()              # не показано — отрисовки не будет
+    deadline = time.monotonic() + 5
+    while w.workspace is None and time.monotonic() < deadline:
+        qapp.processEvents()
+    assert w.workspace is not None
+    w.close()
+
+
+def test_startup_timer_counts_modules():
+    from app.core.startup import StartupTimer
+
+    t = StartupTimer()
+    with t.phase("json"):
+        import json  # noqa: F401
+    assert t.elapsed("json") >= 0 and t.elapsed("nope") == -1
+    assert "json" in t.report()
@@ -0,0 +1,39 @@
+import pytest
+from app.domain.models import Task
+
+pytest.importorskip("PySide6")
+
+
+class _Bus:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event):
+        self.events.append(event)
+
+
+def test_autosave_coalesces_dirty_fields(repo, qapp, monkeypatch):
+    from app.ui.views.task_editor import TaskEditor
+
+    t = repo.add(Task(parent_id=None, title="T", description=""))
+    bus = _Bus()
+    editor = TaskEditor(repo, bus)
+    editor.load_task(t.id)
+    assert bus.events == []  # загрузка ничего не пишет
+
+    writes = []
+    update = repo.update
+    monkeypatch.setattr(repo, "update", lambda tid, **f: writes.append(f) or update(tid, **f))
+    for ch in "hello":
+        editor.desc.insertPlainText(ch)
+    editor.priority.setValue(5)
+    assert writes == [] and editor._autosave.isActive()
+
+    editor.flush()
+    assert writes == [{"description": "hello", "priority": 5}]
+    assert len(bus.events) == 1
+
+    editor.priority.setValue(5)
+    editor.flush()
+    assert len(writes) == 1  # без изменений — без записи
+    assert repo.get(t.id).description == "hello"
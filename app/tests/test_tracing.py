@@ -0,0 +1,58 @@
+import json
+import pytest
+from app.core.events import EventBus, TaskUpdated
+from app.core.tracing import Histogram, tracer
+from app.domain.models import Task
+from app.usecases.toggle_status import ToggleStatus, ToggleStatusInput
+
+
+@pytest.fixture
+def tracing(monkeypatch):
+    monkeypatch.setattr(tracer, "enabled", True)
+    tracer.reset()
+    yield tracer
+    tracer.reset()
+
+
+def test_usecase_spans_nest_repo_calls_and_dispatch(repo, tracing, tmp_path):
+    t = repo.add(Task(parent_id=None, title="T"))
+    bus = EventBus()
+    seen = []
+    bus.subscribe(TaskUpdated, seen.append)
+    toggle = ToggleStatus(repo, bus)
+    for _ in range(3):
+        toggle.execute(ToggleStatusInput(t.id))
+
+    spans = tracing.summary()
+    assert spans["ToggleStatus"]["count"] == 3
+    assert "ToggleStatus/TaskRepository.update" in spans
+    assert any(p.startswith("ToggleStatus/emit TaskUpdated/") for p in spans)
+    assert "TaskRepository.add" in spans   # вне usecase — свой корень
+    assert [c.name for c in tracing.last.children][-1] == "emit TaskUpdated"
+
+    repo.get(t.id)                         # одиночный вызов репозитория — тоже корень
+    assert tracing.last.name == "TaskRepository.get"
+    assert tracing.last_usecase.name == "ToggleStatus"
+    assert tracing.histogram("ToggleStatus") == spans["ToggleStatus"]
+    assert tracing.histogram("нет такого") is None
+
+    out = tmp_path / "trace.json"
+    tracing.dump(out)
+    assert json.loads(out.read_text(encoding="utf-8"))["last_usecase"]["name"] == "ToggleStatus"
+
+
+def test_disabled_tracer_records_nothing(repo):
+    tracer.reset()
+    assert not tracer.enabled
+    repo.add(Task(parent_id=None, title="T"))
+    assert tracer.summary() == {}
+
+
+def test_histogram_percentiles():
+    h = Histogram(samples=50)
+    for ms in range(1, 101):
+        h.add(float(ms))
+    s = h.summary()
+    assert s["count"] == 100 and s["max_ms"] == 100
+    assert 50 <= s["p50_ms"] <= 100   # в кольце остались последние 50 значений
+    assert s["p99_ms"] == 100
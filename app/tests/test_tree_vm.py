@@ -0,0 +1,214 @@
+import pytest
+from app.domain.models import Task
+
+pytest.importorskip("PySide6")
+from PySide6.QtCore import Qt
+from app.ui.viewmodels.tree_vm import build_tree
+
+
+def _titles(items):
+    return [(i.row.title, _titles(i.children)) for i in items]
+
+
+def test_build_tree_from_single_scan(repo):
+    root = repo.add(Task(parent_id=None, title="Root"))
+    b = repo.add(Task(parent_id=root.id, title="B"))
+    a = repo.add(Task(parent_id=root.id, title="A"))
+    repo.add(Task(parent_id=a.id, title="A1"))
+    repo.move(a.id, new_parent_id=root.id, new_order_index=0)
+    repo.add(Task(parent_id=None, title="Other"))
+
+    roots = build_tree(repo.tree_plain())
+    assert _titles(roots) == [
+        ("Root", [("A", [("A1", [])]), ("B", [])]),
+        ("Other", []),
+    ]
+    assert roots[0].children[1].parent is roots[0]
+    assert [i.row_idx() for i in roots] == [0, 1]
+    assert [i.row_idx() for i in roots[0].children] == [0, 1]
+
+
+def test_lazy_model_fetches_on_demand(repo):
+    from app.ui.viewmodels.tree_vm import TaskTreeModel
+
+    root = repo.add(Task(parent_id=None, title="Root"))
+    a = repo.add(Task(parent_id=root.id, title="A"))
+    repo.add(Task(parent_id=a.id, title="A1"))
+    repo.add(Task(parent_id=None, title="Leaf"))
+
+    model = TaskTreeModel(repo, lazy=True)
+    root_idx, leaf_idx = model.index(0, 0), model.index(1, 0)
+    assert model.rowCount() == 2
+    assert model.hasChildren(root_idx) and not model.hasChildren(leaf_idx)
+    assert model.rowCount(root_idx) == 0 and model.canFetchMore(root_idx)
+    assert not model.canFetchMore(leaf_idx)
+
+    model.fetchMore(root_idx)
+    assert not model.canFetchMore(root_idx)
+    a_idx = model.index(0, 0, root_idx)
+    assert model.data(a_idx) == "A" and model.canFetchMore(a_idx)
+
+
+def _dump(model, parent=None):
+    from PySide6.QtCore import QModelIndex
+
+    parent = parent or QModelIndex()
+    out = []
+    for r in range(model.rowCount(parent)):
+        idx = model.index(r, 0, parent)
+        assert model.parent(idx) == parent
+        out.append((model.data(idx), _dump(model, idx)))
+    return out
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_events_update_model_in_place(repo, lazy):
+    from app.core.events import TaskAdded, TaskDeleted, TaskMoved, TaskUpdated
+    from app.ui.viewmodels.tree_vm import TaskTreeModel
+
+    root = repo.add(Task(parent_id=None, title="Root"))
+    a = repo.add(Task(parent_id=root.id, title="A"))
+    b = repo.add(Task(parent_id=root.id, title="B"))
+    model = TaskTreeModel(repo, lazy=lazy)
+    model.fetchMore(model.index(0, 0))
+    resets = []
+    model.modelReset.connect(lambda: resets.append(1))
+
+    c = repo.add(Task(parent_id=root.id, title="C"))
+    model.apply_event(TaskAdded(c.id))
+    repo.update(a.id, title="A2")
+    model.apply_event(TaskUpdated(a.id))
+    repo.move(c.id, new_parent_id=root.id, new_order_index=0)
+    model.apply_event(TaskMoved(c.id))
+    repo.move(b.id, new_parent_id=None, new_order_index=0)
+    model.apply_event(TaskMoved(b.id))
+    assert _dump(model) == [("B", []), ("Root", [("C", []), ("A2", [])])]
+
+    repo.delete(root.id)
+    model.apply_event(TaskDeleted(root.id))
+    assert _dump(model) == [("B", [])]
+    assert resets == []
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_progress_rollups_follow_events(repo, lazy):
+    from app.core.events import TaskAdded, TaskDeleted, TaskMoved, TaskUpdated
+    from app.domain.models import Status
+    from app.ui.viewmodels.tree_vm import TaskTreeModel
+
+    root = repo.add(Task(parent_id=None, title="Root"))
+    a = repo.add(Task(parent_id=root.id, title="A"))
+    a1 = repo.add(Task(parent_id=a.id, title="A1"))
+    other = repo.add(Task(parent_id=None, title="Other"))
+    model = TaskTreeModel(repo, lazy=lazy, columns=["progress", "status"])
+    root_idx = model.index(0, 0)
+    model.fetchMore(root_idx)
+    # итоги ленивых узлов читаются по запросу — как при отрисовке колонки
+    progress = lambda: [(model.rollup(i).total, i.done) for i in model.root_items]
+    assert model.columnCount() == 3
+    assert model.headerData(1, Qt.Horizontal) == "Прогресс"
+    assert progress() == [(3, 0), (1, 0)]
+
+    repo.update(a1.id, status=Status.DONE)           # лист в незагруженной ветви (lazy)
+    model.apply_event(TaskUpdated(a1.id))
+    repo.update(root.id, status=Status.DONE)
+    model.apply_event(TaskUpdated(root.id))
+    assert progress() == [(3, 2), (1, 0)]
+    assert model.data(model.index(0, 1)) == "67%"
+    assert model.data(model.index(0, 2)) == "Готово"
+
+    b = repo.add(Task(parent_id=a.id, title="B", status=Status.DONE))
+    model.apply_event(TaskAdded(b.id))
+    assert progress() == [(4, 3), (1, 0)]
+    repo.move(a.id, new_parent_id=other.id, new_order_index=0)
+    model.apply_event(TaskMoved(a.id))
+    assert progress() == [(1, 1), (4, 2)]
+    repo.delete(a.id)
+    model.apply_event(TaskDeleted(a.id))
+    assert progress() == [(1, 1), (1, 0)]
+
+
+def test_lazy_roots_load_rollups_on_demand(repo):
+    from app.data import db
+    from app.ui.viewmodels.tree_vm import TaskTreeModel
+
+    root = repo.add(Task(parent_id=None, title="Root"))
+    repo.add(Task(parent_id=root.id, title="A"))
+    model = TaskTreeModel(repo, lazy=True, columns=["progress"])
+    assert model.root_items[0].total is None        # корни грузятся без сканирования ветвей
+    with db.query_profile() as prof:
+        assert model.data(model.index(0, 1)) == "0%"
+        assert model.data(model.index(0, 1)) == "0%"
+    assert prof.count == 1
+    assert model.root_items[0].total == 2
+
+
+def _snapshot(model, parent=None):
+    """(название, child_count, total, done) по всему дереву; ленивые ветви догружаются."""
+    if parent is not None and model.canFetchMore(parent):
+        model.fetchMore(parent)
+    out = []
+    for r in range(model.rowCount(parent or model.index(-1, -1))):
+        idx = model.index(r, 0, parent) if parent is not None else model.index(r, 0)
+        item = model.rollup(idx.internalPointer())
+        out.append((item.row.title, item.child_count, item.total, item.done, _snapshot(model, idx)))
+    return out
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_queued_ticks_with_several_writes_keep_model_consistent(repo, lazy):
+    import random
+    from app.core.events import EventBus, TaskAdded, TaskDeleted, TaskMoved, TaskUpdated, TasksChanged
+    from app.ui.viewmodels.tree_vm import TaskTreeModel
+    from app.usecases.add_task import AddTask, AddTaskInput
+    from app.usecases.delete_task import DeleteTask, DeleteTaskInput
+    from app.usecases.move_task import MoveTask, MoveTaskInput
+    from app.usecases.toggle_status import ToggleStatus, ToggleStatusInput
+    from app.usecases.update_task import UpdateTask, UpdateTaskInput
+
+    bus = EventBus(scheduler=lambda: None)
+    model = TaskTreeModel(repo, lazy=lazy, columns=["progress"])
+    for evt in (TaskAdded, TaskDeleted, TaskMoved, TaskUpdated, TasksChanged):
+        bus.subscribe(evt, model.apply_event)
+
+    # Root→A и A→B за один такт: обработчики не должны считать B дважды
+    root = AddTask(repo, bus).execute(AddTaskInput(None, "Root"))
+    bus.flush()
+    a = AddTask(repo, bus).execute(AddTaskInput(root.id, "A"))
+    AddTask(repo, bus).execute(AddTaskInput(a.id, "B"))
+    bus.flush()
+    assert _snapshot(model) == _snapshot(TaskTreeModel(repo, lazy=lazy))
+    assert _snapshot(model)[0][1:4] == (1, 3, 0)
+
+    rnd = random.Random(3)
+    for step in range(60):
+        ids = [r["id"] for r in repo.project(["id"], as_dict=True)]
+        op = rnd.choice(["add", "add", "toggle", "title", "move", "delete"]) if ids else "add"
+        tid = rnd.choice(ids) if ids else None
+        if op == "add":
+            AddTask(repo, bus).execute(AddTaskInput(rnd.choice([None, *ids]), f"n{step}"))
+        elif op == "toggle":
+            ToggleStatus(repo, bus).execute(ToggleStatusInput(tid))
+        elif op == "title":
+            UpdateTask(repo, bus).execute(UpdateTaskInput(tid, {"title": f"t{step}"}))
+        elif op == "move":
+            target = rnd.choice([None, *ids])
+            if target is None or not repo.is_descendant(target, tid):
+                MoveTask(repo, bus).execute(MoveTaskInput(tid, target, rnd.randint(0, 3)))
+        else:
+            DeleteTask(repo, bus).execute(DeleteTaskInput(tid))
+        if step % 3 == 2:
+            bus.flush()
+            assert _snapshot(model) == _snapshot(TaskTreeModel(repo, lazy=lazy)), step
+
+
+def test_eager_load_reads_only_rendered_columns(repo):
+    from app.ui.viewmodels.tree_vm import TaskTreeModel
+
+    root = repo.add(Task(parent_id=None, title="Root", description="длинное описание"))
+    repo.cache.clear()
+    model = TaskTreeModel(repo, lazy=False)
+    assert len(repo.cache) == 0                  # неполные записи в кэш не попадают
+    row = model.root_items[0].row
+    assert (row.title, row.description, row.path) == ("Root", None, None)
+    assert repo.get(root.id).description == "длинное описание"   # редактор — мимо записей дерева
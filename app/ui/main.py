@@ -1,26 +1,47 @@
+import logging
 import sys
-from PySide6.QtWidgets import QApplication
-from app.core.config import settings
-from app.core.logging_config import setup_logging
-from app.data.db import ensure_db
-from app.ui.main_window import MainWindow
+from app.core.defaults import theme_qss
+from app.core.startup import StartupTimer
+
+# отсчёт холодного старта — от импорта этого модуля
+startup = StartupTimer()
 
 def main():
+    from app.core.logging_config import setup_logging
     setup_logging()
-    ensure_db()
+    with startup.phase("импорт Qt"):
+        from PySide6.QtWidgets import QApplication
+        from app.ui.main_window import MainWindow
 
     app = QApplication(sys.argv)
-
     try:
-        with open(settings.theme_qss, "r", encoding="utf-8") as f:
+        # тема нужна до первой отрисовки — путь без загрузки config
+        with open(theme_qss(), "r", encoding="utf-8") as f:
             app.setStyleSheet(f.read())
     except Exception:
         pass
+    startup.mark("QApplication и тема")
 
-    w = MainWindow()
+    # окно с заглушкой; БД, виджеты и дерево — после первой отрисовки (MainWindow.start)
+    w = MainWindow(startup)
     w.resize(1200, 720)
     w.show()
-    sys.exit(app.exec())
+    code = app.exec()
+
+    from app.core.config import settings
+    if settings.sql_profile:
+        _log_query_stats()
+    if settings.trace_file:
+        from app.core.tracing import tracer
+        tracer.dump(settings.trace_file)
+    sys.exit(code)
+
+def _log_query_stats():
+    from app.data.db import query_stats
+    log = logging.getLogger("app.sql")
+    log.info("SQL за сеанс: %s", query_stats)
+    for row in query_stats.top(10):
+        log.info("%6d × %9.1f мс (max %.1f): %s", row["count"], row["total_ms"], row["max_ms"], row["sql"][:200])
 
 if __name__ == "__main__":
     main()
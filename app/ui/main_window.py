@@ -1,51 +1,69 @@
-from PySide6.QtWidgets import QMainWindow, QSplitter, QWidget, QVBoxLayout
-from PySide6.QtCore import Qt
-from app.data.repositories import TaskRepository
-from app.core.events import EventBus
-from app.ui.views.task_tree import TaskTree
-from app.ui.views.task_editor import TaskEditor
-from app.ui.views.toolbar import MainToolbar
+import logging
+from typing import Optional
+from PySide6.QtWidgets import QLabel, QMainWindow
+from PySide6.QtCore import QEvent, Qt, QTimer
+from app.core.startup import StartupTimer
+
+log = logging.getLogger(__name__)
+
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    """Окно появляется сразу с заглушкой; модули данных, схема БД и виджеты — в start().
+
+    start() вызывается сам после первой отрисовки заглушки, а если окно не
+    рисуется (запуск свёрнутым) — по таймеру START_FALLBACK_MS; тесты и скрипты
+    могут позвать его явно, не дожидаясь цикла событий.
+    """
+
+    START_FALLBACK_MS = 500
+
+    def __init__(self, startup: Optional[StartupTimer] = None):
         super().__init__()
         self.setWindowTitle("TaskTree")
-        self.repo = TaskRepository()
-        self.bus = EventBus()
-
-        # центральный сплиттер
-        splitter = QSplitter(Qt.Orientation.Horizontal)
-        self.tree = TaskTree(repo=self.repo, bus=self.bus)
-        self.editor = TaskEditor(repo=self.repo, bus=self.bus)
-        self.tree.selection_changed.connect(self.editor.load_task)
-
-        splitter.addWidget(self.tree)
-        splitter.addWidget(self.editor)
-        splitter.setStretchFactor(0, 0)   # дерево фиксированнее
-        splitter.setStretchFactor(1, 1)   # редактор растягивается
-        splitter.setHandleWidth(5)
-
-        # верхний тулбар
-        tb = MainToolbar(self, repo=self.repo, bus=self.bus)
-
-        #  контейнер с layout
-        root = QWidget()
-        lay = QVBoxLayout(root)
-        lay.setContentsMargins(0, 0, 0, 0)
-        lay.setSpacing(0)
-        lay.addWidget(tb)
-        lay.addWidget(splitter)
-
-        self.setCentralWidget(root)
         self.resize(1100, 700)
+        self.startup = startup or StartupTimer()
+        self.workspace = None
+        self._painted = False
+
+        self.placeholder = QLabel("Загрузка…")
+        self.placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.placeholder.installEventFilter(self)
+        self.setCentralWidget(self.placeholder)
+        # дочерний таймер умирает вместе с окном
+        self._fallback = QTimer(self)
+        self._fallback.setSingleShot(True)
+        self._fallback.timeout.connect(self.start)
+        self._fallback.start(self.START_FALLBACK_MS)
+
+    def eventFilter(self, obj, ev):
+        if obj is self.placeholder and ev.type() == QEvent.Type.Paint and not self._painted:
+            self._painted = True
+            self.startup.mark("первая отрисовка")
+            QTimer.singleShot(0, self.start)
+        return super().eventFilter(obj, ev)
+
+    def start(self):
+        self._fallback.stop()
+        if self.workspace is not None:
+            return
+        with self.startup.phase("импорт приложения"):
+            from app.data.db import ensure_db
+            from app.ui.workspace import Workspace
+        with self.startup.phase("схема БД"):
+            ensure_db()
+        with self.startup.phase("виджеты"):
+            self.workspace = Workspace(self)
+            self.workspace.loaded.connect(self._on_loaded)
+            self.setCentralWidget(self.workspace)
+            self.setStatusBar(self.workspace.status)
 
-        # сидер на пустую БД — если нужно
-        self._seed_if_empty()
+    def closeEvent(self, ev):
+        if self.workspace is not None:
+            self.workspace.shutdown()
+        super().closeEvent(ev)
 
-    def _seed_if_empty(self):
-        if len(self.repo.children_plain(None)) == 0:
-            from app.usecases.add_task import AddTask, AddTaskInput
-            add = AddTask(self.repo, self.bus)
-            root = add.execute(AddTaskInput(None, "Учёба"))
-            add.execute(AddTaskInput(root.id, "ДевОпс"))
-            add.execute(AddTaskInput(root.id, "Клауд Компьютинг"))
+    def _on_loaded(self):
+        if self.startup.elapsed("дерево") < 0:
+            self.startup.mark_gap()
+            self.startup.mark("дерево")
+            log.info("Запуск, мс:\n%s", self.startup.report())
@@ -0,0 +1,57 @@
+import logging
+from concurrent.futures import Future
+from typing import Callable, Optional
+from PySide6.QtCore import QObject, Qt, Signal
+from app.data.async_repo import AsyncTaskRepository
+
+log = logging.getLogger(__name__)
+
+
+class DbBridge(QObject):
+    """Доставляет результаты AsyncTaskRepository в GUI-поток.
+
+    on_done(result) / on_error(exc) вызываются в потоке, где живёт мост;
+    busy_changed(n) — число запросов, ещё не доставленных в GUI.
+    """
+
+    busy_changed = Signal(int)
+    _delivered = Signal(object, object, object)   # future, on_done, on_error
+
+    def __init__(self, db: AsyncTaskRepository, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.busy = 0
+        self._delivered.connect(self._deliver, Qt.ConnectionType.QueuedConnection)
+
+    def read(self, fn, *args, on_done: Optional[Callable] = None,
+             on_error: Optional[Callable] = None, **kwargs) -> Future:
+        return self._track(self.db.read(fn, *args, **kwargs), on_done, on_error)
+
+    def write(self, fn, *args, on_done: Optional[Callable] = None,
+              on_error: Optional[Callable] = None, **kwargs) -> Future:
+        return self._track(self.db.write(fn, *args, **kwargs), on_done, on_error)
+
+    def shutdown(self, wait: bool = True):
+        self.db.shutdown(wait=wait)
+
+    def _track(self, fut: Future, on_done, on_error) -> Future:
+        self._set_busy(self.busy + 1)
+        # колбэк future идёт в рабочем потоке — сигнал переносит его в GUI
+        fut.add_done_callback(lambda f: self._delivered.emit(f, on_done, on_error))
+        return fut
+
+    def _deliver(self, fut: Future, on_done, on_error):
+        self._set_busy(self.busy - 1)
+        exc = fut.exception()
+        if exc is not None:
+            if on_error is not None:
+                on_error(exc)
+            else:
+                log.error("Ошибка фоновой операции БД", exc_info=exc)
+            return
+        if on_done is not None:
+            on_done(fut.result())
+
+    def _set_busy(self, n: int):
+        self.busy = n
+        self.busy_changed.emit(n)
@@ -0,0 +1,28 @@
+from PySide6.QtCore import QObject, Qt, Signal
+from app.core.events import EventBus
+
+
+class EventPump(QObject):
+    """Отложенная доставка событий EventBus через цикл Qt.
+
+    Первое событие такта ставит в очередь Qt один вызов flush(); всё, что
+    пришло до него (в том числе из других потоков), доставляется одной
+    порцией в GUI-потоке — перерисовки сливаются в кадр.
+    """
+
+    _wake = Signal()
+
+    def __init__(self, bus: EventBus, parent=None):
+        super().__init__(parent)
+        self.bus = bus
+        self.flushes = 0
+        self._wake.connect(self._flush, Qt.ConnectionType.QueuedConnection)
+        bus.set_scheduler(self._wake.emit)
+
+    def stop(self):
+        """Возвращает шине синхронную доставку; хвост очереди доставляется сразу."""
+        self.bus.set_scheduler(None)
+
+    def _flush(self):
+        self.flushes += 1
+        self.bus.flush()
@@ -0,0 +1,138 @@
+from typing import List, Optional, Set
+from PySide6.QtCore import QObject, QRunnable, QSortFilterProxyModel, QThreadPool, QTimer, Signal
+from app.data.repositories import TaskRepository
+
+
+class _WorkerSignals(QObject):
+    page = Signal(int, list)     # generation, rows
+    finished = Signal(int)       # generation
+
+
+class SearchWorker(QRunnable):
+    """Выполняет search_plain постранично в пуле потоков.
+
+    Между страницами сверяет generation с контроллером: если пользователь
+    уже ввёл новый запрос, работа прекращается, не дочитав выдачу.
+    """
+
+    def __init__(self, controller: "SearchController", query: str, generation: int):
+        super().__init__()
+        self.controller = controller
+        self.query = query
+        self.generation = generation
+        self.signals = _WorkerSignals()
+
+    def run(self):
+        offset = 0
+        size = self.controller.page_size
+        while not self._stale():
+            rows = self.controller.repo.search_plain(
+                self.query, limit=size, offset=offset
+            )
+            if self._stale():
+                return
+            if rows:
+                self.signals.page.emit(self.generation, rows)
+            offset += len(rows)
+            if len(rows) < size or offset >= self.controller.max_results:
+                break
+        self.signals.finished.emit(self.generation)
+
+    def _stale(self) -> bool:
+        return self.generation != self.controller.generation
+
+
+class SearchController(QObject):
+    """Поиск по мере ввода: debounce, фоновые запросы, отмена устаревших.
+
+    Сигналы приходят только для актуального запроса: reset() перед новой
+    выдачей, page(rows) для каждой страницы, finished() в конце.
+    """
+
+    reset = Signal()
+    page = Signal(list)
+    finished = Signal()
+
+    def __init__(self, repo: TaskRepository, debounce_ms: int = 150,
+                 page_size: int = 200, max_results: int = 5000, parent=None):
+        super().__init__(parent)
+        self.repo = repo
+        self.page_size = page_size
+        self.max_results = max_results
+        self.generation = 0   # номер актуального запроса; читается из воркеров
+        self.query = ""
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self._start)
+
+    def set_query(self, query: str):
+        self.query = query.strip()
+        self.generation += 1          # всё, что уже в полёте, становится устаревшим
+        if not self.query:
+            self._timer.stop()
+            self.reset.emit()
+            self.finished.emit()
+            return
+        self._timer.start()
+
+    def _start(self):
+        worker = SearchWorker(self, self.query, self.generation)
+        worker.signals.page.connect(self._on_page)
+        worker.signals.finished.connect(self._on_finished)
+        self.reset.emit()
+        self.pool.start(worker)
+
+    def _on_page(self, generation: int, rows: list):
+        if generation == self.generation:
+            self.page.emit(rows)
+
+    def _on_finished(self, generation: int):
+        if generation == self.generation:
+            self.finished.emit()
+
+    def wait(self, msecs: int = -1) -> bool:
+        return self.pool.waitForDone(msecs)
+
+
+class TaskFilterProxy(QSortFilterProxyModel):
+    """Показывает только найденные задачи и их предков (None — без фильтра)."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._ids: Optional[Set[int]] = None
+
+    @property
+    def active(self) -> bool:
+        return self._ids is not None
+
+    def set_visible_ids(self, ids: Optional[Set[int]]):
+        self._begin_filter_change()
+        self._ids = None if ids is None else set(ids)
+        self._end_filter_change()
+
+    def add_visible_ids(self, ids: List[int]):
+        self._begin_filter_change()
+        if self._ids is None:
+            self._ids = set()
+        self._ids.update(ids)
+        self._end_filter_change()
+
+    # Qt ≥ 6.9: begin/endFilterChange; раньше — invalidateRowsFilter
+    def _begin_filter_change(self):
+        if hasattr(self, "beginFilterChange"):
+            self.beginFilterChange()
+
+    def _end_filter_change(self):
+        if hasattr(self, "endFilterChange"):
+            self.endFilterChange(QSortFilterProxyModel.Direction.Rows)
+        else:
+            self.invalidateRowsFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._ids is None:
+            return True
+        item = self.sourceModel().index(source_row, 0, source_parent).internalPointer()
+        return item is not None and item.row.id in self._ids
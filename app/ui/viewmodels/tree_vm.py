@@ -1,40 +1,512 @@
 ﻿from PySide6.QtCore import QAbstractItemModel, QModelIndex, Qt
-from typing import Optional, List
+from operator import itemgetter
+from typing import Optional, List, Sequence
+from app.core.config import settings
+from app.core.events import TaskAdded, TaskDeleted, TaskMoved, TaskUpdated, TasksChanged, TasksReordered
 from app.data.repositories import TaskRepository
+from app.domain.models import Status, TaskRow
+from app.domain.services import path_ids
+
+# колонки дерева: ключ -> заголовок; "title" всегда первая
+COLUMNS = {
+    "title": "Задача",
+    "progress": "Прогресс",
+    "status": "Статус",
+    "priority": "Приоритет",
+    "due": "Срок",
+    "category": "Категория",
+}
+STATUS_LABELS = {Status.TODO: "К выполнению", Status.IN_PROGRESS: "В работе", Status.DONE: "Готово"}
+# поля, которые дерево показывает или по которым строится; описание, путь и даты
+# не читаются — редактор берёт полную запись через repo.get()
+TREE_FIELDS = ("id", "parent_id", "title", "status", "priority", "due_at", "category", "order_index")
+
 
 class TreeItem:
-    def __init__(self, row: dict, parent: Optional["TreeItem"] = None):
-        self.row = row   # dict: id, parent_id, title, status, priority, due_at, order_index
+    __slots__ = ("row", "parent", "children", "child_count", "fetched", "pos", "total", "done")
+
+    def __init__(self, row: TaskRow, parent: Optional["TreeItem"] = None, pos: int = 0,
+                 child_count: int = 0, total: Optional[int] = 1, done: Optional[int] = None):
+        self.row = row   # неизменяемая запись; при обновлении заменяется целиком
         self.parent = parent
         self.children: List["TreeItem"] = []
+        # число детей в БД; до fetchMore children пуст, а child_count уже известен
+        self.child_count = child_count
+        self.fetched = True
+        # позиция среди братьев (и среди корней) — поддерживается при вставке/удалении
+        self.pos = pos
+        # итоги по поддереву вместе с узлом; при изменениях правится цепочка предков.
+        # None — не загружены (ленивый узел): читаются по запросу, см. TaskTreeModel.rollup()
+        self.total = total
+        if total is None:
+            self.done = None
+        else:
+            self.done = int(row.status == Status.DONE) if done is None else done
+
+    @property
+    def progress(self) -> float:
+        return self.done / self.total if self.total else 0.0
 
     def row_idx(self) -> int:
-        if not self.parent:
-            return 0
-        return self.parent.children.index(self)
+        return self.pos
+
+
+def renumber(items: List[TreeItem], start: int = 0):
+    """Обновляет закэшированные позиции items[start:] после вставки/удаления."""
+    for i in range(start, len(items)):
+        items[i].pos = i
+
+def narrow_rows(columns: Sequence[str], rows) -> List[TaskRow]:
+    """Кортежи repo.project(columns) → TaskRow; непрочитанные поля — None.
+
+    Такие записи только для показа: в кэш записей они не кладутся.
+    """
+    pick = itemgetter(*(columns.index(f) if f in columns else len(columns) for f in TaskRow._fields))
+    make = TaskRow._make
+    return [make(pick((*r, None))) for r in rows]
+
+def build_tree(rows: List[TaskRow]) -> List[TreeItem]:
+    """Собирает дерево из плоских записей за O(N).
+
+    Записи должны идти в порядке (parent_id, order_index) — как их отдают
+    TaskRepository.tree_plain() и project(); узлы без существующего родителя отбрасываются.
+    """
+    items = {r.id: TreeItem(r) for r in rows}
+    roots: List[TreeItem] = []
+    for r in rows:
+        item = items[r.id]
+        pid = r.parent_id
+        if pid is None:
+            item.pos = len(roots)
+            roots.append(item)
+            continue
+        parent = items.get(pid)
+        if parent is not None:
+            item.parent = parent
+            item.pos = len(parent.children)
+            parent.children.append(item)
+            parent.child_count += 1
+    # итоги снизу вверх: order растёт по ходу обхода (BFS), обратный порядок — листья раньше
+    order = list(roots)
+    for item in order:
+        order.extend(item.children)
+    for item in reversed(order):
+        if item.parent is not None:
+            item.parent.total += item.total
+            item.parent.done += item.done
+    return roots
+
+
+def lazy_items(rows: List[dict], parent: Optional[TreeItem] = None) -> List[TreeItem]:
+    """Узлы одного уровня (rows из children_plain(with_counts=True)), дети не загружены.
+
+    Итоги берутся из sub_total/sub_done, если они есть в записи (get_plain), иначе неизвестны.
+    """
+    items = [
+        TreeItem(TaskRow.from_mapping(r), parent, i, r["child_count"], r.get("sub_total"), r.get("sub_done"))
+        for i, r in enumerate(rows)
+    ]
+    for item in items:
+        item.fetched = item.child_count == 0
+    return items
+
 
 class TaskTreeModel(QAbstractItemModel):
-    def __init__(self, repo: TaskRepository):
+    # TasksChanged длиннее — одна перезагрузка вместо множества точечных правок
+    BATCH_RELOAD = 50
+    # правка этих полей меняет положение узла — её не применить без запроса
+    _STRUCTURAL = frozenset({"parent_id", "order_index", "path"})
+    # столько соседних узлов без итогов догружается одним запросом при отрисовке
+    ROLLUP_PAGE = 64
+
+    def __init__(self, repo: TaskRepository, lazy: Optional[bool] = None,
+                 columns: Optional[List[str]] = None, load: bool = True):
         super().__init__()
         self.repo = repo
+        self.lazy = settings.tree_lazy if lazy is None else lazy
+        wanted = settings.tree_columns if columns is None else columns
+        self.columns = ["title"] + [c for c in wanted if c in COLUMNS and c != "title"]
         self.root_items: List[TreeItem] = []
-        self.reload()
+        self._by_id: dict[int, TreeItem] = {}
+        if load:
+            self.reload()
 
     def reload(self):
+        self.set_roots(self.load_roots())
+
+    def load_roots(self) -> List[TreeItem]:
+        """Читает БД и строит узлы; не трогает модель, можно звать из рабочего потока."""
+        if self.lazy:
+            # только корни + число их детей; ветви догружаются в fetchMore
+            return lazy_items(self.repo.children_plain(None, with_counts=True))
+        # одна выборка всей таблицы, только показываемые колонки
+        return build_tree(narrow_rows(TREE_FIELDS, self.repo.project(TREE_FIELDS)))
+
+    def set_roots(self, roots: List[TreeItem]):
         self.beginResetModel()
-        self.root_items.clear()
+        self.root_items = roots
+        self._by_id = {}
+        self._register(roots)
+        self.endResetModel()
+
+    def index_for_id(self, task_id: int) -> QModelIndex:
+        """Индекс загруженного узла по id (невалидный, если узел не загружен)."""
+        return self._index_of(self._by_id.get(task_id))
+
+    def reveal(self, chain: List[int]):
+        """Подгружает ветви по цепочке id от корня, чтобы узел chain[-1] появился в модели."""
+        for task_id in chain[:-1]:
+            item = self._by_id.get(task_id)
+            if item is None:
+                return
+            if not item.fetched:
+                self.fetchMore(self._index_of(item))
+
+    # --- точечные обновления по событиям EventBus ---
+    def apply_event(self, event):
+        """Применяет TaskAdded/Deleted/Moved/Updated, TasksReordered и пачки TasksChanged к дереву."""
+        if isinstance(event, TasksChanged):
+            # события пачки приходят уже после всех записей: обработчик, читающий БД,
+            # видит конечное состояние, и дельты следующих событий легли бы поверх него
+            # второй раз. По одному применяются только чистые дельты — иначе перечитать
+            events = event.events
+            if len(events) > self.BATCH_RELOAD or (
+                len(events) > 1 and not all(self._is_delta(e) for e in events)
+            ):
+                self.reload()
+                return
+            for e in event.events:
+                self.apply_event(e)
+            return
+        handler = {
+            TaskAdded: self._on_added,
+            TaskDeleted: self._on_deleted,
+            TaskMoved: self._on_moved,
+            TaskUpdated: self._on_updated,
+            TasksReordered: self._on_reordered,
+        }.get(type(event))
+        if handler:
+            handler(event)
+
+    def _is_delta(self, event) -> bool:
+        """Событие применяется без чтения БД: правка известных неструктурных полей."""
+        if not isinstance(event, TaskUpdated) or not event.changes:
+            return False
+        if self._STRUCTURAL & event.changes.keys():
+            return False
+        return "status" not in event.changes or "status" in event.previous
+
+    def _on_added(self, event: TaskAdded):
+        row = self.repo.get_plain(event.task_id)
+        if row is not None:
+            self._insert_row(row)
+
+    def _on_deleted(self, event: TaskDeleted):
+        item = self._by_id.get(event.task_id)
+        if item is not None:
+            self._remove_item(item)
+        elif event.path:
+            # удалён незагруженный узел: поправить итоги его загруженного предка
+            self._refresh_nearest(path_ids(event.path)[:-1])
 
-        def build(parent_item: Optional[TreeItem], parent_id: Optional[int]):
-            for r in self.repo.children_plain(parent_id):  # ← ПЛОСКИЕ ЗАПИСИ ИЗ РЕПО
-                node = TreeItem(r, parent_item)
-                if parent_item:
-                    parent_item.children.append(node)
+    def _on_updated(self, event: TaskUpdated):
+        task_id, changes = event.task_id, event.changes
+        item = self._by_id.get(task_id)
+        if changes and not self._STRUCTURAL & changes.keys():
+            # всё нужное есть в событии — без запроса к БД; поля вне TaskRow дерево не показывает
+            fields = {k: v for k, v in changes.items() if k in TaskRow._fields}
+            if item is None:
+                if "status" not in fields:
+                    return
+                chain = self.repo.ancestor_ids(task_id)
+                if "status" in event.previous:
+                    d_done = (fields["status"] == Status.DONE) - (event.previous["status"] == Status.DONE)
+                    self._bump(self._nearest(chain), 0, d_done)
                 else:
-                    self.root_items.append(node)
-                build(node, r["id"])
+                    self._refresh_nearest(chain)
+                return
+            if fields:
+                was_done = item.row.status == Status.DONE
+                item.row = item.row._replace(**fields)
+                self._bump(item, 0, (item.row.status == Status.DONE) - was_done)
+                self._emit_row(item)
+            return
+        if item is None:
+            self._refresh_nearest(self.repo.ancestor_ids(task_id))
+            return
+        row = self.repo.get_plain(task_id)
+        if row is None:
+            self._remove_item(item)
+            return
+        item.row = TaskRow.from_mapping(row)
+        self._set_rollup(item, row)
+        self._emit_row(item)
 
-        build(None, None)
-        self.endResetModel()
+    def _on_moved(self, event: TaskMoved):
+        task_id = event.task_id
+        item = self._by_id.get(task_id)
+        row = self.repo.get_plain(task_id)
+        if row is None:
+            if item is not None:
+                self._remove_item(item)
+            return
+        if item is None:
+            self._insert_row(row)
+            old_parent = event.old_parent_id
+            if old_parent is not None:
+                # старые предки узнаются из события; ближайший загруженный берёт итоги из БД
+                self._refresh_nearest([*self.repo.ancestor_ids(old_parent), old_parent])
+            return
+        pid = row["parent_id"]
+        new_parent = self._by_id.get(pid) if pid is not None else None
+        if pid is not None and (new_parent is None or not new_parent.fetched):
+            # новый родитель не загружен — узел просто уходит из видимой части
+            self._remove_item(item)
+            self._grow_unfetched(new_parent, row)
+            return
+
+        src = self._children_of(item.parent)
+        dst = self._children_of(new_parent)
+        src_row = self._row_of(item)
+        pos = min(self.repo.sibling_position(task_id) or 0, len(dst) - (dst is src))
+        item.row = TaskRow.from_mapping(row)
+        if dst is src and pos == src_row:
+            self._set_rollup(item, row)
+            self._emit_row(item)
+            return
+        # Qt ждёт позицию назначения до удаления исходной строки
+        dest_row = pos + 1 if dst is src and pos > src_row else pos
+        if not self.beginMoveRows(
+            self._index_of(item.parent), src_row, src_row, self._index_of(new_parent), dest_row
+        ):
+            self.reload()  # перенос в собственного потомка — дерево уже не согласовано
+            return
+        del src[src_row]
+        dst.insert(pos, item)
+        if dst is src:
+            renumber(dst, min(pos, src_row))
+        else:
+            renumber(src, src_row)
+            renumber(dst, pos)
+        if item.parent is not None:
+            item.parent.child_count -= 1
+        if new_parent is not None:
+            new_parent.child_count += 1
+        old_parent, item.parent = item.parent, new_parent
+        self.endMoveRows()
+        if dst is not src:
+            self._carry(item, old_parent, new_parent)
+        self._set_rollup(item, row)
+
+    def _on_reordered(self, event: TasksReordered):
+        pid = event.parent_id
+        parent = self._by_id.get(pid) if pid is not None else None
+        if pid is not None and (parent is None or not parent.fetched):
+            return   # дети не загружены — порядок прочитается в fetchMore
+        # конечный порядок — из БД: братья не из списка сохранили ключи и стоят между ними
+        rank = {tid: i for i, (tid,) in enumerate(self.repo.project(["id"], parent_id=pid))}
+        siblings = self._children_of(parent)
+        ordered = sorted(siblings, key=lambda it: rank.get(it.row.id, len(rank)))
+        if ordered == siblings:
+            return
+        # одна смена раскладки вместо переноса каждой строки
+        self.layoutAboutToBeChanged.emit()
+        siblings[:] = ordered
+        renumber(siblings)
+        old, new = [], []
+        for idx in self.persistentIndexList():
+            it = idx.internalPointer()
+            if idx.isValid() and it.parent is parent and idx.row() != it.pos:
+                old.append(idx)
+                new.append(self.createIndex(it.pos, idx.column(), it))
+        self.changePersistentIndexList(old, new)
+        self.layoutChanged.emit()
+
+    def _insert_row(self, row: dict):
+        pid = row["parent_id"]
+        parent = self._by_id.get(pid) if pid is not None else None
+        if pid is not None and (parent is None or not parent.fetched):
+            self._grow_unfetched(parent, row)
+            return
+        siblings = self._children_of(parent)
+        pos = min(self.repo.sibling_position(row["id"]) or 0, len(siblings))
+        item = lazy_items([row], parent)[0]
+        self.beginInsertRows(self._index_of(parent), pos, pos)
+        siblings.insert(pos, item)
+        renumber(siblings, pos)
+        if parent is not None:
+            parent.child_count += 1
+        self._register([item])
+        self.endInsertRows()
+        self._carry(item, None, parent)
+
+    def _remove_item(self, item: TreeItem):
+        siblings = self._children_of(item.parent)
+        r = self._row_of(item)
+        self.beginRemoveRows(self._index_of(item.parent), r, r)
+        del siblings[r]
+        renumber(siblings, r)
+        if item.parent is not None:
+            item.parent.child_count -= 1
+        self._unregister(item)
+        self.endRemoveRows()
+        self._carry(item, item.parent, None)
+
+    def _grow_unfetched(self, parent: Optional[TreeItem], row: dict):
+        # у незагруженного узла меняется только счётчик (и стрелка раскрытия) и итоги
+        if parent is None:
+            # родителя нет в модели — итоги перечитывает ближайший загруженный предок
+            self._refresh_nearest(path_ids(row.get("path"))[:-1])
+            return
+        parent.child_count += 1
+        idx = self._index_of(parent)
+        self.dataChanged.emit(idx, idx)
+        self._bump(parent, row.get("sub_total", 1), row.get("sub_done", 0))
+
+    # --- итоги по поддеревьям ---
+    def rollup(self, item: TreeItem) -> TreeItem:
+        """Узел с загруженными итогами.
+
+        Ленивые узлы приходят без итогов (их подсчёт сканирует ветви); при первой
+        отрисовке итоги читаются одним запросом сразу для ROLLUP_PAGE соседей.
+        """
+        if item.total is None:
+            siblings = self._children_of(item.parent)
+            page = [it for it in siblings[item.pos:item.pos + self.ROLLUP_PAGE] if it.total is None]
+            for it_id, (total, done) in self.repo.rollups(it.row.id for it in page).items():
+                it = self._by_id.get(it_id)
+                if it is not None:
+                    it.total, it.done = total, done
+        return item
+
+    def _set_rollup(self, item: TreeItem, row: dict):
+        """Берёт итоги узла из свежей записи и переносит разницу на предков."""
+        if "sub_total" not in row:
+            return
+        if item.total is None:
+            # прежних итогов не было — разницу не посчитать, предки перечитают свои
+            item.total, item.done = row["sub_total"], row["sub_done"]
+            self._forget(item.parent)
+            return
+        self._bump(item, row["sub_total"] - item.total, row["sub_done"] - item.done)
+
+    def _carry(self, item: TreeItem, src: Optional[TreeItem], dst: Optional[TreeItem]):
+        """Переносит итоги item из цепочки src в цепочку dst (None — нет родителя)."""
+        if item.total is None:
+            self._forget(src)
+            self._forget(dst)
+            return
+        self._bump(src, -item.total, -item.done)
+        self._bump(dst, item.total, item.done)
+
+    def _forget(self, item: Optional[TreeItem]):
+        """Итоги item и предков становятся неизвестными и перечитаются при отрисовке."""
+        col = self.columns.index("progress") if "progress" in self.columns else -1
+        while item is not None:
+            item.total = item.done = None
+            if col >= 0:
+                idx = self.createIndex(item.pos, col, item)
+                self.dataChanged.emit(idx, idx, [Qt.DisplayRole])
+            item = item.parent
+
+    def _nearest(self, chain: List[int]) -> Optional[TreeItem]:
+        """Ближайший загруженный узел из chain (id от корня вниз)."""
+        for anc_id in reversed(chain):
+            anc = self._by_id.get(anc_id)
+            if anc is not None:
+                return anc
+        return None
+
+    def _refresh_nearest(self, chain: List[int]):
+        # узел не загружен: старых значений нет — итоги перечитываются у ближайшего
+        # загруженного предка из chain (от корня вниз), разница уходит выше
+        for anc_id in reversed(chain):
+            anc = self._by_id.get(anc_id)
+            if anc is not None:
+                row = self.repo.get_plain(anc_id)
+                if row is not None:
+                    self._set_rollup(anc, row)
+                return
+
+    def _bump(self, item: Optional[TreeItem], d_total: int, d_done: int):
+        """Прибавляет разницу к итогам item и всех его предков — O(глубины)."""
+        if not (d_total or d_done):
+            return
+        col = self.columns.index("progress") if "progress" in self.columns else -1
+        while item is not None:
+            if item.total is None:
+                # итоги ещё не загружены — при загрузке они придут уже с изменением
+                item = item.parent
+                continue
+            item.total += d_total
+            item.done += d_done
+            if col >= 0:
+                idx = self.createIndex(item.pos, col, item)
+                self.dataChanged.emit(idx, idx, [Qt.DisplayRole])
+            item = item.parent
+
+    def _emit_row(self, item: TreeItem):
+        self.dataChanged.emit(
+            self._index_of(item),
+            self.createIndex(item.pos, len(self.columns) - 1, item),
+            [Qt.DisplayRole, Qt.EditRole],
+        )
+
+    def _register(self, items: List[TreeItem]):
+        stack = list(items)
+        while stack:
+            it = stack.pop()
+            self._by_id[it.row.id] = it
+            stack.extend(it.children)
+
+    def _unregister(self, item: TreeItem):
+        stack = [item]
+        while stack:
+            it = stack.pop()
+            self._by_id.pop(it.row.id, None)
+            stack.extend(it.children)
+
+    def _children_of(self, parent: Optional[TreeItem]) -> List[TreeItem]:
+        return parent.children if parent is not None else self.root_items
+
+    def _row_of(self, item: TreeItem) -> int:
+        return item.pos
+
+    def _index_of(self, item: Optional[TreeItem]) -> QModelIndex:
+        if item is None:
+            return QModelIndex()
+        return self.createIndex(self._row_of(item), 0, item)
+
+    # --- ленивая подгрузка ---
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self.root_items)
+        if parent.column() > 0:
+            return False
+        item: TreeItem = parent.internalPointer()
+        return item.child_count > 0
+
+    def canFetchMore(self, parent):
+        if not parent.isValid():
+            return False
+        item: TreeItem = parent.internalPointer()
+        return not item.fetched
+
+    def fetchMore(self, parent):
+        if not parent.isValid():
+            return
+        item: TreeItem = parent.internalPointer()
+        if item.fetched:
+            return
+        children = lazy_items(self.repo.children_plain(item.row.id, with_counts=True), item)
+        item.fetched = True
+        item.child_count = len(children)
+        if not children:
+            return
+        self.beginInsertRows(parent, 0, len(children) - 1)
+        item.children = children
+        self._register(children)
+        self.endInsertRows()
 
     def index(self, row, column, parent=QModelIndex()):
         if not self.hasIndex(row, column, parent):
@@ -49,38 +521,62 @@ class TaskTreeModel(QAbstractItemModel):
         item: TreeItem = index.internalPointer()
         if item.parent is None:
             return QModelIndex()
-        return self.createIndex(item.parent.row_idx(), 0, item.parent)
+        return self.createIndex(item.parent.pos, 0, item.parent)
 
     def rowCount(self, parent=QModelIndex()):
         if parent.isValid():
+            if parent.column() > 0:
+                return 0
             item: TreeItem = parent.internalPointer()
             return len(item.children)
         return len(self.root_items)
 
     def columnCount(self, parent=QModelIndex()):
-        return 1
+        return len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole and 0 <= section < len(self.columns):
+            return COLUMNS[self.columns[section]]
+        return None
 
     def data(self, index, role=Qt.DisplayRole):
         if not index.isValid():
             return None
         item: TreeItem = index.internalPointer()
-        if role in (Qt.DisplayRole, Qt.EditRole):
-            return item.row["title"]
+        key = self.columns[index.column()]
+        if key == "title":
+            if role in (Qt.DisplayRole, Qt.EditRole):
+                return item.row.title
+            return None
+        if role != Qt.DisplayRole:
+            return None
+        if key == "progress":
+            return f"{self.rollup(item).progress:.0%}"
+        if key == "status":
+            return STATUS_LABELS.get(item.row.status, item.row.status)
+        if key == "priority":
+            return "" if item.row.priority is None else str(item.row.priority)
+        if key == "due":
+            due = item.row.due_at
+            return due.strftime("%Y-%m-%d %H:%M") if due else ""
+        if key == "category":
+            return item.row.category or ""
         return None
 
     def flags(self, index):
         if not index.isValid():
             return Qt.ItemIsEnabled
         base = super().flags(index)
-        return base | Qt.ItemIsSelectable | Qt.ItemIsEditable | Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled | Qt.ItemIsEnabled
+        base |= Qt.ItemIsSelectable | Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled | Qt.ItemIsEnabled
+        return base | Qt.ItemIsEditable if index.column() == 0 else base
 
     def setData(self, index, value, role=Qt.EditRole):
-        if role != Qt.EditRole:
+        if role != Qt.EditRole or index.column() != 0:
             return False
         item: TreeItem = index.internalPointer()
         from app.usecases.update_task import UpdateTask, UpdateTaskInput
-        UpdateTask(self.repo, None).execute(UpdateTaskInput(item.row["id"], {"title": str(value)}))
-        item.row["title"] = str(value)
+        UpdateTask(self.repo, None).execute(UpdateTaskInput(item.row.id, {"title": str(value)}))
+        item.row = item.row._replace(title=str(value))
         self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
         return True
 
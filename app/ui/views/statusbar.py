@@ -1,22 +1,58 @@
-﻿from PySide6.QtWidgets import QStatusBar
-from app.core.events import EventBus, TaskAdded, TaskDeleted, TaskUpdated, TaskMoved
+﻿from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QLabel, QStatusBar
+from app.core.config import settings
+from app.core.events import EventBus, TaskAdded, TaskDeleted, TaskUpdated, TaskMoved, TasksChanged
 from app.data.repositories import TaskRepository
+from app.core.tracing import Span, tracer
+from app.domain.services import NodeStatsService
 
 class MainStatusBar(QStatusBar):
-    def __init__(self, repo: TaskRepository, bus: EventBus):
+    def __init__(self, repo: TaskRepository, bus: EventBus, stats: NodeStatsService | None = None):
         super().__init__()
         self.repo = repo
         self.bus = bus
-        for evt in (TaskAdded, TaskDeleted, TaskUpdated, TaskMoved):
-            bus.subscribe(evt, lambda e: self.refresh())
+        self.stats = stats or NodeStatsService(repo, bus)
+        for evt in (TaskAdded, TaskDeleted, TaskUpdated, TaskMoved, TasksChanged):
+            bus.subscribe(evt, self._on_event, weak=True)
+        # индикатор фоновых операций БД (set_in_flight подключается к DbBridge.busy_changed)
+        self.in_flight = QLabel()
+        self.in_flight.hide()
+        self.addPermanentWidget(self.in_flight)
+        # панель трассировки для разработки (TT_TRACE=1): последний usecase и его разбивка в подсказке
+        self.trace = None
+        if settings.trace:
+            self.trace = QLabel()
+            self.addPermanentWidget(self.trace)
+            self._trace_timer = QTimer(self)
+            self._trace_timer.timeout.connect(self.refresh_trace)
+            self._trace_timer.start(1000)
+        self.refresh()
+
+    def set_in_flight(self, n: int):
+        self.in_flight.setText(f"⏳ БД: {n}")
+        self.in_flight.setVisible(n > 0)
+
+    def refresh_trace(self):
+        last = tracer.last_usecase
+        if self.trace is None or last is None:
+            return
+        hist = tracer.histogram(last.path) or {}
+        self.trace.setText(f"⏱ {last.name}: {last.ms:.1f} мс · p95 {hist.get('p95_ms', 0):.1f}")
+        self.trace.setToolTip("\n".join(_span_lines(last)))
+
+    def _on_event(self, _event):
         self.refresh()
 
     def refresh(self):
-        cnt = 0
-        def count_tree(pid=None):
-            nonlocal cnt
-            for t in self.repo.children(pid):
-                cnt += 1
-                count_tree(t.id)
-        count_tree(None)
-        self.showMessage(f"Всего задач: {cnt}")
\ No newline at end of file
+        st = self.stats.stats(None)
+        msg = f"Всего задач: {st.total} · готово: {st.done} ({st.progress:.0%})"
+        if st.overdue:
+            msg += f" · просрочено: {st.overdue}"
+        self.showMessage(msg)
+
+
+def _span_lines(span: Span, depth: int = 0) -> list[str]:
+    lines = [f"{'  ' * depth}{span.name}: {span.ms:.2f} мс"]
+    for child in span.children:
+        lines.extend(_span_lines(child, depth + 1))
+    return lines
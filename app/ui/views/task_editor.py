@@ -1,10 +1,11 @@
 from PySide6.QtWidgets import (
     QWidget, QFormLayout, QLineEdit, QTextEdit, QComboBox,
     QSpinBox, QDateTimeEdit, QLabel, QVBoxLayout, QHBoxLayout,
-    QDialog, QPushButton, QSizePolicy, QFrame
+    QDialog, QPushButton, QSizePolicy, QFrame, QApplication
 )
 from PySide6.QtCore import Qt, QDateTime, QTimer, QEvent
 from PySide6.QtGui import QTextOption
+from app.core.config import settings
 from app.data.repositories import TaskRepository
 from app.core.events import EventBus
 from app.usecases.update_task import UpdateTask, UpdateTaskInput
@@ -29,6 +30,9 @@ class TaskEditor(QWidget):
         self.repo = repo
         self.bus = bus
         self.current_id: int | None = None
+        self._saved: dict = {}      # значения полей на момент загрузки/последней записи
+        self._dirty: set[str] = set()
+        self._loading = False
 
         # --- Верхняя часть (заголовок)
         self.title = QLineEdit()
@@ -109,46 +113,70 @@ class TaskEditor(QWidget):
         self.timer.timeout.connect(self._update_timers)
         self.timer.start(1000)
 
+        # --- Автосохранение: правки копятся и пишутся одним UpdateTask после паузы
+        self._autosave = QTimer(self)
+        self._autosave.setSingleShot(True)
+        self._autosave.setInterval(settings.autosave_debounce_ms)
+        self._autosave.timeout.connect(self.flush)
+
         # --- Сигналы
-        self.title.editingFinished.connect(self._save)
-        self.desc.textChanged.connect(self._save)
-        self.status.currentIndexChanged.connect(self._save)
-        self.priority.valueChanged.connect(self._save)
-        self.category.editTextChanged.connect(self._save)
-        self.due.dateTimeChanged.connect(self._save)
+        self.title.textEdited.connect(lambda *_: self._mark_dirty("title"))
+        self.title.editingFinished.connect(self.flush)
+        self.desc.textChanged.connect(lambda: self._mark_dirty("description"))
+        self.status.currentIndexChanged.connect(lambda *_: self._mark_dirty("status"))
+        self.priority.valueChanged.connect(lambda *_: self._mark_dirty("priority"))
+        self.category.editTextChanged.connect(lambda *_: self._mark_dirty("category"))
+        self.due.dateTimeChanged.connect(lambda *_: self._mark_dirty("due_at"))
+        app = QApplication.instance()
+        if app is not None:
+            app.focusChanged.connect(self._on_focus_changed)
 
     # --- загрузка задачи ---
     def load_task(self, task_id: int):
+        self.flush()  # несохранённые правки предыдущей задачи
         if task_id == -1:
             self._clear()
             return
-        obj = self.repo.get(task_id)
-        self.current_id = task_id
-        self.title.setText(obj.title or "")
-        self.desc.setPlainText(obj.description or "")
-        self.status.setCurrentText(obj.status)
-        self.priority.setValue(obj.priority or 3)
-        self.category.setCurrentText(getattr(obj, "category", "") or "")
-        if obj.due_at:
-            self.due.setDateTime(QDateTime.fromSecsSinceEpoch(int(obj.due_at.timestamp())))
-        else:
-            self.due.setDateTime(QDateTime.currentDateTime())
+        obj = self.repo.get(task_id)  # из кэша, если строка уже загружена
+        if obj is None:
+            self._clear()
+            return
+        self._loading = True
+        try:
+            self.current_id = task_id
+            self.title.setText(obj.title or "")
+            self.desc.setPlainText(obj.description or "")
+            self.status.setCurrentText(obj.status)
+            self.priority.setValue(obj.priority or 3)
+            self.category.setCurrentText(obj.category or "")
+            if obj.due_at:
+                self.due.setDateTime(QDateTime.fromSecsSinceEpoch(int(obj.due_at.timestamp())))
+            else:
+                self.due.setDateTime(QDateTime.currentDateTime())
+        finally:
+            self._loading = False
+        self._saved = self._field_values()
+        self._dirty.clear()
         self._update_timers()
 
     def _clear(self):
-        self.current_id = None
-        self.title.clear()
-        self.desc.clear()
-        self.priority.setValue(3)
-        self.category.setCurrentIndex(0)
+        self._loading = True
+        try:
+            self.current_id = None
+            self.title.clear()
+            self.desc.clear()
+            self.priority.setValue(3)
+            self.category.setCurrentIndex(0)
+        finally:
+            self._loading = False
+        self._saved = {}
+        self._dirty.clear()
         self.countdown.setText("-")
         self.overdue.setText("-")
 
     # --- сохранение ---
-    def _save(self):
-        if not self.current_id:
-            return
-        fields = {
+    def _field_values(self) -> dict:
+        return {
             "title": self.title.text(),
             "description": self.desc.toPlainText(),
             "status": self.status.currentText(),
@@ -156,7 +184,36 @@ class TaskEditor(QWidget):
             "category": self.category.currentText(),
             "due_at": self.due.dateTime().toPython(),
         }
+
+    def _mark_dirty(self, field: str):
+        if self._loading or not self.current_id:
+            return
+        self._dirty.add(field)
+        self._autosave.start()  # перезапуск окна debounce
+
+    def flush(self):
+        """Записывает накопленные правки одним UpdateTask — только изменившиеся поля."""
+        self._autosave.stop()
+        if not self.current_id or not self._dirty:
+            return
+        values = self._field_values()
+        fields = {k: values[k] for k in self._dirty if values[k] != self._saved.get(k)}
+        self._dirty.clear()
+        if not fields:
+            return
         UpdateTask(self.repo, self.bus).execute(UpdateTaskInput(self.current_id, fields))
+        self._saved.update(fields)
+
+    def _on_focus_changed(self, old, new):
+        # фокус ушёл из редактора (в дерево, тулбар, другое окно) — сохраняем сразу
+        if old is None or not self.isAncestorOf(old):
+            return
+        if new is None or not self.isAncestorOf(new):
+            self.flush()
+
+    def hideEvent(self, ev):
+        self.flush()
+        super().hideEvent(ev)
 
     # --- обновление таймеров ---
     def _update_timers(self):
@@ -1,19 +1,36 @@
-﻿from PySide6.QtWidgets import QTreeView
+﻿from PySide6.QtWidgets import QHeaderView, QTreeView
 from PySide6.QtCore import Signal
 from app.ui.viewmodels.tree_vm import TaskTreeModel
+from app.ui.viewmodels.db_bridge import DbBridge
+from app.ui.viewmodels.search_vm import SearchController, TaskFilterProxy
 from app.data.repositories import TaskRepository
-from app.core.events import EventBus, TaskAdded, TaskDeleted, TaskMoved, TaskUpdated
+from app.domain.services import path_ids
+from app.core.events import (
+    EventBus, TaskAdded, TaskDeleted, TaskMoved, TaskUpdated, TasksChanged, TasksReordered,
+)
 
 class TaskTree(QTreeView):
     selection_changed = Signal(int)
+    loaded = Signal()            # дерево перечитано (reload)
 
-    def __init__(self, repo: TaskRepository, bus: EventBus):
+    def __init__(self, repo: TaskRepository, bus: EventBus, db: DbBridge | None = None,
+                 load: bool = True):
         super().__init__()
         self.repo = repo
         self.bus = bus
-        self.model_ = TaskTreeModel(repo)
-        self.setModel(self.model_)
-        self.setHeaderHidden(True)
+        self.db = db
+        # load=False — модель пуста до первого reload() (старт окна не ждёт чтения дерева)
+        self.model_ = TaskTreeModel(repo, load=load)
+        self.proxy = TaskFilterProxy(self)
+        self.proxy.setSourceModel(self.model_)
+        self.setModel(self.proxy)
+        self.setHeaderHidden(self.model_.columnCount() == 1)
+        header = self.header()
+        header.setStretchLastSection(False)
+        # без ResizeToContents: он измеряет все строки и тормозит на больших деревьях
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        for col in range(1, self.model_.columnCount()):
+            header.resizeSection(col, 110 if self.model_.columns[col] in ("due", "category") else 80)
         self.setEditTriggers(QTreeView.EditTrigger.EditKeyPressed | QTreeView.EditTrigger.SelectedClicked)
         self.setUniformRowHeights(True)
         self.setAlternatingRowColors(True)
@@ -21,13 +38,47 @@ class TaskTree(QTreeView):
 
         self.selectionModel().selectionChanged.connect(self._on_selection)
 
-        for evt in (TaskAdded, TaskDeleted, TaskMoved, TaskUpdated):
-            bus.subscribe(evt, lambda e: self.model_.reload())
+        for evt in (TaskAdded, TaskDeleted, TaskMoved, TaskUpdated, TasksChanged, TasksReordered):
+            bus.subscribe(evt, self.model_.apply_event, weak=True)
 
-    def _on_selection(self, *_):
-        idx = self.currentIndex()
-        if not idx.isValid():
-            self.selection_changed.emit(-1)
+        # поиск: запросы в фоне, выдача страницами сужает дерево
+        self.search = SearchController(repo, parent=self)
+        self.search.reset.connect(self._on_search_reset)
+        self.search.page.connect(self._on_search_page)
+
+    def reload(self):
+        """Перечитывает дерево; с DbBridge чтение и сборка идут в фоне."""
+        if self.db is None:
+            self.model_.reload()
+            self.loaded.emit()
             return
-        item = idx.internalPointer()
-        self.selection_changed.emit(item.row["id"])
+        self.db.read(self.model_.load_roots, on_done=self._set_roots)
+
+    def _set_roots(self, roots):
+        self.model_.set_roots(roots)
+        self.loaded.emit()
+
+    def set_search(self, query: str):
+        self.search.set_query(query)
+
+    def current_task_id(self) -> int | None:
+        idx = self.proxy.mapToSource(self.currentIndex())
+        if not idx.isValid():
+            return None
+        return idx.internalPointer().row.id
+
+    def _on_search_reset(self):
+        self.proxy.set_visible_ids(set() if self.search.query else None)
+
+    def _on_search_page(self, rows: list):
+        chains = [path_ids(r.get("path")) or [r["id"]] for r in rows]
+        for chain in chains:
+            self.model_.reveal(chain)
+        self.proxy.add_visible_ids([tid for chain in chains for tid in chain])
+        for chain in chains:
+            for tid in chain[:-1]:
+                self.expand(self.proxy.mapFromSource(self.model_.index_for_id(tid)))
+
+    def _on_selection(self, *_):
+        task_id = self.current_task_id()
+        self.selection_changed.emit(-1 if task_id is None else task_id)
@@ -1,35 +1,46 @@
-﻿from PySide6.QtWidgets import QToolBar, QInputDialog, QMessageBox
+﻿from pathlib import Path
+from PySide6.QtWidgets import QToolBar, QInputDialog, QMessageBox, QLineEdit, QFileDialog
 from PySide6.QtGui import QAction
+from PySide6.QtCore import Signal
 from app.data.repositories import TaskRepository
 from app.core.events import EventBus
 from app.usecases.add_task import AddTask, AddTaskInput
 from app.usecases.delete_task import DeleteTask, DeleteTaskInput
 from app.usecases.toggle_status import ToggleStatus, ToggleStatusInput
+from app.ui.viewmodels.db_bridge import DbBridge
 
 class MainToolbar(QToolBar):
-    def __init__(self, parent=None, repo: TaskRepository=None, bus: EventBus=None):
+    search_changed = Signal(str)
+
+    def __init__(self, parent=None, repo: TaskRepository=None, bus: EventBus=None, db: DbBridge=None):
         super().__init__("MainToolbar", parent)
-        self.repo = repo; self.bus = bus
+        self.repo = repo; self.bus = bus; self.db = db
 
         act_new = QAction("+ Новая", self)
         act_sub = QAction("↳ Подзадача", self)
         act_edit_done = QAction("✓ Готово", self)
         act_del = QAction("⌫ Удалить", self)
+        act_backup = QAction("⤓ Копия", self)
 
         act_new.triggered.connect(self._add_root)
         act_sub.triggered.connect(self._add_child)
         act_edit_done.triggered.connect(self._toggle_done)
         act_del.triggered.connect(self._delete)
+        act_backup.triggered.connect(self._backup)
 
-        for a in (act_new, act_sub, act_edit_done, act_del):
+        for a in (act_new, act_sub, act_edit_done, act_del, act_backup):
             self.addAction(a)
 
+        self.addSeparator()
+        self.search = QLineEdit()
+        self.search.setPlaceholderText("Поиск…")
+        self.search.setClearButtonEnabled(True)
+        self.search.setMaximumWidth(320)
+        self.search.textChanged.connect(self.search_changed)
+        self.addWidget(self.search)
+
     def _current_task_id(self) -> int | None:
-        tv = self.parent().centralWidget().widget(0)
-        idx = tv.currentIndex()
-        if not idx or not idx.isValid():
-            return None
-        return idx.internalPointer().row["id"]
+        return self.parent().tree.current_task_id()
 
     def _add_root(self):
         title, ok = QInputDialog.getText(self, "Новая задача", "Заголовок:")
@@ -55,4 +66,25 @@ class MainToolbar(QToolBar):
         if not tid:
             return
         if QMessageBox.question(self, "Удалить", "Удалить ветвь целиком?"):
-            DeleteTask(self.repo, self.bus).execute(DeleteTaskInput(tid, cascade=True))
+            inp = DeleteTaskInput(tid, cascade=True)
+            if self.db is None:
+                DeleteTask(self.repo, self.bus).execute(inp)
+                return
+            # большая ветвь удаляется в потоке записи; событие — уже в GUI-потоке
+            self.db.write(
+                DeleteTask(self.repo, None).execute, inp,
+                on_done=lambda event: event and self.bus.emit(event),
+            )
+
+    def _backup(self):
+        dest = QFileDialog.getExistingDirectory(self, "Папка для резервной копии")
+        if not dest:
+            return
+        done = lambda path: QMessageBox.information(self, "Резервная копия", f"Сохранено: {path}")
+        if self.db is None:
+            done(self.repo.backup(Path(dest)))
+            return
+        self.db.read(
+            "backup", Path(dest), on_done=done,
+            on_error=lambda e: QMessageBox.warning(self, "Резервная копия", str(e)),
+        )
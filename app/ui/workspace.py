@@ -0,0 +1,93 @@
+from PySide6.QtWidgets import QLabel, QMainWindow, QSplitter, QStackedWidget, QVBoxLayout, QWidget
+from PySide6.QtCore import Qt, Signal
+from app.data.repositories import TaskRepository
+from app.data.async_repo import AsyncTaskRepository
+from app.core.config import settings
+from app.core.events import EventBus
+from app.domain.services import NodeStatsService
+from app.ui.views.task_tree import TaskTree
+from app.ui.views.task_editor import TaskEditor
+from app.ui.views.toolbar import MainToolbar
+from app.ui.views.statusbar import MainStatusBar
+from app.ui.viewmodels.db_bridge import DbBridge
+from app.ui.viewmodels.event_pump import EventPump
+
+
+class Workspace(QWidget):
+    """Содержимое главного окна: тулбар, дерево, редактор и статус-бар.
+
+    Строится после первой отрисовки окна (MainWindow.start); дерево читается
+    в фоне, до его прихода на месте дерева — заглушка, а тулбар выключен:
+    события правок, пришедшие в пустую модель, затёр бы set_roots.
+    loaded — дерево на экране.
+    """
+
+    loaded = Signal()
+
+    def __init__(self, window: QMainWindow):
+        super().__init__(window)
+        self.repo = TaskRepository()
+        # сидер — до шины и подписчиков: события ему не нужны, а модель дерева
+        # иначе перечитала бы себя синхронно прямо перед фоновой загрузкой
+        self._seed_if_empty()
+        self.bus = EventBus()
+        if settings.events_queued:
+            self.events = EventPump(self.bus, self)
+        # кэши подписываются с приоритетом: сбрасываются до refresh виджетов
+        self.repo.cache.bind(self.bus)
+        self.stats = NodeStatsService(self.repo, self.bus)
+        # тяжёлые операции (удаление ветвей, копия, перезагрузка) — в фоновых потоках БД
+        self.db = DbBridge(AsyncTaskRepository(self.repo), self)
+
+        # центральный сплиттер; дерево загрузится в фоне
+        splitter = QSplitter(Qt.Orientation.Horizontal)
+        self.tree = TaskTree(repo=self.repo, bus=self.bus, db=self.db, load=False)
+        self.editor = TaskEditor(repo=self.repo, bus=self.bus)
+        self.tree.selection_changed.connect(self.editor.load_task)
+        self.tree.loaded.connect(self._on_tree_loaded)
+
+        self.tree_stack = QStackedWidget()
+        loading = QLabel("Загрузка дерева…")
+        loading.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.tree_stack.addWidget(loading)
+        self.tree_stack.addWidget(self.tree)
+
+        splitter.addWidget(self.tree_stack)
+        splitter.addWidget(self.editor)
+        splitter.setStretchFactor(0, 0)   # дерево фиксированнее
+        splitter.setStretchFactor(1, 1)   # редактор растягивается
+        splitter.setHandleWidth(5)
+
+        # верхний тулбар
+        tb = self.toolbar = MainToolbar(self, repo=self.repo, bus=self.bus, db=self.db)
+        tb.search_changed.connect(self.tree.set_search)
+        tb.setEnabled(False)      # до загрузки дерева
+
+        lay = QVBoxLayout(self)
+        lay.setContentsMargins(0, 0, 0, 0)
+        lay.setSpacing(0)
+        lay.addWidget(tb)
+        lay.addWidget(splitter)
+
+        self.status = MainStatusBar(self.repo, self.bus, self.stats)
+        self.db.busy_changed.connect(self.status.set_in_flight)
+
+        self.tree.reload()
+
+    def shutdown(self):
+        self.editor.flush()
+        self.db.shutdown(wait=True)
+
+    def _on_tree_loaded(self):
+        self.tree_stack.setCurrentWidget(self.tree)
+        self.toolbar.setEnabled(True)
+        self.loaded.emit()
+
+    def _seed_if_empty(self):
+        if len(self.repo.children_plain(None)) == 0:
+            from app.usecases.add_task import AddTask, AddTaskInput
+            add = AddTask(self.repo, None)
+            with self.repo.batch():
+                root = add.execute(AddTaskInput(None, "Учёба"))
+                add.execute(AddTaskInput(root.id, "ДевОпс"))
+                add.execute(AddTaskInput(root.id, "Клауд Компьютинг"))
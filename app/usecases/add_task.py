@@ -3,6 +3,7 @@ from typing import Optional
 from app.domain.models import Task
 from app.data.repositories import TaskRepository
 from app.core.events import EventBus, TaskAdded
+from app.core.tracing import traced
 
 @dataclass
 class AddTaskInput:
@@ -15,9 +16,10 @@ class AddTask:
         self.repo = repo
         self.bus = bus
 
+    @traced("AddTask", usecase=True)
     def execute(self, inp: AddTaskInput) -> Task:
         task = Task(parent_id=inp.parent_id, title=inp.title, description=inp.description)
         task = self.repo.add(task)
         if self.bus:
-            self.bus.emit(TaskAdded(task.id))
+            self.bus.emit(TaskAdded(task.id, task.parent_id, task.order_index, task.status))
         return task
\ No newline at end of file
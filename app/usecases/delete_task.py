@@ -1,6 +1,8 @@
 ﻿from dataclasses import dataclass
 from app.data.repositories import TaskRepository
 from app.core.events import EventBus, TaskDeleted
+from app.core.tracing import traced
+from app.domain.models import Status
 
 @dataclass
 class DeleteTaskInput:
@@ -12,6 +14,20 @@ class DeleteTask:
         self.repo = repo
         self.bus = bus
 
-    def execute(self, inp: DeleteTaskInput):
+    @traced("DeleteTask", usecase=True)
+    def execute(self, inp: DeleteTaskInput) -> TaskDeleted | None:
+        """Удаляет задачу; возвращает событие (его шлёт в шину и вызывающий без bus)."""
+        old = self.repo.get(inp.task_id)
+        if old is None:
+            return None
+        # счётчики удаляемого — до удаления: подписчики вычтут их без пересчёта по всей БД
+        if inp.cascade:
+            st = self.repo.subtree_stats(inp.task_id)
+            removed = {"total": st["total"], "done": st["done"]}
+        else:
+            removed = {"total": 1, "done": int(old.status == Status.DONE)}
         self.repo.delete(inp.task_id, inp.cascade)
-        self.bus.emit(TaskDeleted(inp.task_id))
\ No newline at end of file
+        event = TaskDeleted(inp.task_id, old.parent_id, old.path, removed)
+        if self.bus:
+            self.bus.emit(event)
+        return event
\ No newline at end of file
@@ -2,6 +2,7 @@
 from typing import Optional
 from app.data.repositories import TaskRepository
 from app.core.events import EventBus, TaskMoved
+from app.core.tracing import traced
 
 @dataclass
 class MoveTaskInput:
@@ -14,7 +15,15 @@ class MoveTask:
         self.repo = repo
         self.bus = bus
 
+    @traced("MoveTask", usecase=True)
     def execute(self, inp: MoveTaskInput):
-        # TODO: запретить перенос в своего потомка (валидация цикла)
+        if inp.new_parent_id is not None and self.repo.is_descendant(inp.new_parent_id, inp.task_id):
+            raise ValueError("Нельзя перенести задачу внутрь её же поддерева")
+        old = self.repo.get(inp.task_id)
         self.repo.move(inp.task_id, inp.new_parent_id, inp.new_order_index)
-        self.bus.emit(TaskMoved(inp.task_id))
\ No newline at end of file
+        if self.bus and old is not None:
+            new = self.repo.get(inp.task_id)
+            self.bus.emit(TaskMoved(
+                inp.task_id, old.parent_id, inp.new_parent_id,
+                old.order_index, new.order_index if new else None,
+            ))
\ No newline at end of file
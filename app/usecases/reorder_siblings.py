@@ -1,6 +1,8 @@
 ﻿from dataclasses import dataclass
 from typing import List, Optional
 from app.data.repositories import TaskRepository
+from app.core.events import EventBus, TasksReordered
+from app.core.tracing import traced
 
 @dataclass
 class ReorderSiblingsInput:
@@ -8,16 +10,13 @@ class ReorderSiblingsInput:
     ordered_ids: List[int]
 
 class ReorderSiblings:
-    def __init__(self, repo: TaskRepository):
+    def __init__(self, repo: TaskRepository, bus: EventBus | None = None):
         self.repo = repo
+        self.bus = bus
 
+    @traced("ReorderSiblings", usecase=True)
     def execute(self, inp: ReorderSiblingsInput):
-        from app.data.db import session_scope
-        from app.domain.models import Task
-        with session_scope() as s:
-            id_to_idx = {tid: i for i, tid in enumerate(inp.ordered_ids)}
-            for tid, idx in id_to_idx.items():
-                obj = s.get(Task, tid)
-                if obj and obj.parent_id == inp.parent_id:
-                    obj.order_index = idx
-                    s.add(obj)
\ No newline at end of file
+        new = self.repo.reorder(inp.parent_id, inp.ordered_ids)
+        # одно событие на весь список: брат с прежним ключом тоже мог сменить место
+        if self.bus and new:
+            self.bus.emit(TasksReordered(inp.parent_id, list(new)))
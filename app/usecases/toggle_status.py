@@ -2,6 +2,7 @@
 from app.data.repositories import TaskRepository
 from app.core.events import EventBus, TaskUpdated
 from app.domain.models import Status
+from app.core.tracing import traced
 
 @dataclass
 class ToggleStatusInput:
@@ -12,10 +13,12 @@ class ToggleStatus:
         self.repo = repo
         self.bus = bus
 
+    @traced("ToggleStatus", usecase=True)
     def execute(self, inp: ToggleStatusInput):
         obj = self.repo.get(inp.task_id)
         if not obj:
             return
         new_status = Status.DONE if obj.status != Status.DONE else Status.TODO
         self.repo.update(inp.task_id, status=new_status)
-        self.bus.emit(TaskUpdated(inp.task_id))
\ No newline at end of file
+        if self.bus:
+            self.bus.emit(TaskUpdated(inp.task_id, {"status": new_status}, {"status": obj.status}))
\ No newline at end of file
@@ -2,6 +2,7 @@
 from typing import Dict, Any
 from app.data.repositories import TaskRepository
 from app.core.events import EventBus, TaskUpdated
+from app.core.tracing import traced
 
 @dataclass
 class UpdateTaskInput:
@@ -13,8 +14,11 @@ class UpdateTask:
         self.repo = repo
         self.bus = bus
 
+    @traced("UpdateTask", usecase=True)
     def execute(self, inp: UpdateTaskInput):
+        old = self.repo.get(inp.task_id) if self.bus else None
         obj = self.repo.update(inp.task_id, **inp.fields)
         if obj and self.bus:
-            self.bus.emit(TaskUpdated(inp.task_id))
+            previous = {k: getattr(old, k, None) for k in inp.fields} if old is not None else {}
+            self.bus.emit(TaskUpdated(inp.task_id, dict(inp.fields), previous))
         return obj
\ No newline at end of file